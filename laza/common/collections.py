@@ -1,8 +1,10 @@
 from abc import ABCMeta
+from array import array
 from collections import ChainMap, UserString as _BaseUserStr
 import sys
 from copy import deepcopy
 from itertools import chain
+from operator import index
 from types import FunctionType, GenericAlias, new_class
 import typing as t
 from collections.abc import (
@@ -112,20 +114,33 @@ class frozendict(dict[_T_Key, _T_Val]):
         return ((k, self[k]) for k in sorted(self))
 
     def __reduce__(self):
-        return self.__class__, (self,), 
+        return _frozen_from_kv_, (self.__class__, tuple(self), tuple(dict.values(self))),
 
     def copy(self):
         return self.__class__(self)
 
+    def __copy__(self):
+        return self
+
     def __deepcopy__(self, memo=None):
-        return self.__class__(deepcopy(dict(self), memo))
+        changed = False
+        items = []
+        for k, v in dict.items(self):
+            ck, cv = deepcopy(k, memo), deepcopy(v, memo)
+            changed = changed or ck is not k or cv is not v
+            items.append((ck, cv))
+        return self.__class__(items) if changed else self
 
     def merge(self, arg=(), /, **kwargs):
         ret = self.copy()
         (arg or kwargs) and dict.update(ret, arg, **kwargs)
         return ret
 
-    __copy__ = copy
+
+
+def _frozen_from_kv_(cls, keys, values):
+    """Rebuild a pickled `frozendict` from its key and value arrays."""
+    return cls(zip(keys, values))
 
 
 
@@ -465,14 +480,8 @@ class _orderedsetabc(t.Generic[_T_Key]):
         else:
             return dict.fromkeys(iterable)
 
-    def __setstate__(self, state):
-        self.__data__ = state
-        
-    def __getstate__(self):
-        return self.__data__.copy()
-        
     def __reduce__(self):
-        return self.__class__, (), self.__getstate__()
+        return self.__class__, (tuple(self.__data__),)
         
     def __setattr__(self, name, value):
         object.__setattr__(self, name, value)
@@ -580,32 +589,47 @@ class _orderedsetabc(t.Generic[_T_Key]):
             i for it in ((v for v in other if v not in self), (v for v in self if v not in other)) for i in it
         )
 
+    def _set_operand_(self, other):
+        if isinstance(other, _orderedsetabc):
+            return other.__set__
+        elif isinstance(other, Set):
+            return other
+        return NotImplemented
+
     def __le__(self, other):
-        return self.__eq__(other) or self.__lt__(other)
+        if other is self:
+            return True
+        elif (other := self._set_operand_(other)) is NotImplemented:
+            return other
+        return self.__set__ <= other
 
     def __lt__(self, other):
         if other is self:
             return False
-        elif isinstance(other, _orderedsetabc):
-            other = other.__set__
-        return self.__set__.__lt__(other)
+        elif (other := self._set_operand_(other)) is NotImplemented:
+            return other
+        return self.__set__ < other
 
     def __gt__(self, other):
         if other is self:
             return False
-        elif isinstance(other, _orderedsetabc):
-            other = other.__set__
-        return self.__set__.__gt__(other)
+        elif (other := self._set_operand_(other)) is NotImplemented:
+            return other
+        return self.__set__ > other
 
     def __ge__(self, other):
-        return self.__eq__(other) or self.__gt__(other)
+        if other is self:
+            return True
+        elif (other := self._set_operand_(other)) is NotImplemented:
+            return other
+        return self.__set__ >= other
 
     def __eq__(self, other):
         if other is self:
             return True
-        elif isinstance(other, _orderedsetabc):
-            other = other.__set__
-        return self.__set__.__eq__(other)
+        elif (other := self._set_operand_(other)) is NotImplemented:
+            return other
+        return self.__set__ == other
 
     def __repr__(self):
         items = tuple(self)
@@ -785,6 +809,18 @@ class frozenorderedset(_orderedsetabc[_T_Key]):
 
     __hash__ = _orderedsetabc._hash
 
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo=None):
+        changed = False
+        items = []
+        for v in self.__data__:
+            cv = deepcopy(v, memo)
+            changed = changed or cv is not v
+            items.append(cv)
+        return self.__class__(items) if changed else self
+
 
 
 @export()
@@ -864,6 +900,231 @@ class orderedset(_orderedsetabc[_T_Key], t.Generic[_T_Key]):
 
 
 
+@export()
+class intorderedset(orderedset[int]):
+    """An `orderedset` of non-negative integers below `2**63`.
+
+    Members are stored in an `array('q')` to keep their order. Members below
+    `bitmap_limit` are tracked in a bitmap for membership tests while larger 
+    ones are kept in a plain set. Ideal for dense integer ids (row ids, flag 
+    indices etc.) as the bitmap grows to `max(members) / 8` bytes, at most 
+    `bitmap_limit / 8`.
+
+    Unlike `orderedset`, `remove()` and `discard()` are O(n) while positional
+    access (`s[i]`) is O(1).
+    """
+
+    __slots__ = '__bits__', '__sparse__',
+
+    __data__: array
+    __bits__: bytearray
+    __sparse__: set[int]
+
+    bitmap_limit: t.ClassVar[int] = 1 << 23
+
+    __setattr__ = object.__setattr__
+
+    def __init__(self, iterable: Iterable[int]=None):
+        if isinstance(iterable, intorderedset):
+            self.__data__ = array('q', iterable.__data__)
+            self.__bits__ = bytearray(iterable.__bits__)
+            self.__sparse__ = set(iterable.__sparse__)
+        else:
+            self._reset_(iterable)
+
+    @property
+    def __set__(self) -> Set[int]:
+        return dict.fromkeys(self.__data__).keys()
+
+    def _reset_(self, iterable: Iterable[int]=None):
+        self.__data__ = array('q')
+        self.__bits__ = bytearray()
+        self.__sparse__ = set()
+        iterable is None or self._extend_(iterable)
+
+    def _extend_(self, iterable: Iterable[int]):
+        bits, sparse, limit = self.__bits__, self.__sparse__, self.bitmap_limit
+        append = self.__data__.append
+        for v in iterable:
+            v = index(v)
+            if not 0 <= v < 1 << 63:
+                raise ValueError(
+                    f'{self.__class__.__name__} members must be '
+                    f'non-negative integers below 2**63. Got: {v!r}'
+                )
+            elif v >= limit:
+                if v not in sparse:
+                    append(v)
+                    sparse.add(v)
+                continue
+            elif (i := v >> 3) >= len(bits):
+                bits.extend(bytes(i - len(bits) + 1))
+
+            m = 1 << (v & 7)
+            if not bits[i] & m:
+                append(v)
+                bits[i] |= m
+
+    def _discard_(self, v: int):
+        if v >= self.bitmap_limit:
+            self.__sparse__.discard(v)
+        else:
+            self.__bits__[v >> 3] &= ~(1 << (v & 7))
+
+    @staticmethod
+    def _member_(o) -> t.Union[int, None]:
+        try:
+            return index(o)
+        except TypeError:
+            pass
+        # like `hash()` equality, integral values of other numeric types 
+        # (e.g. `3.0`) match their `int` member.
+        try:
+            return v if (v := int(o)) == o else None
+        except (TypeError, ValueError, OverflowError):
+            return None
+
+    def __contains__(self, o) -> bool:
+        if (o := self._member_(o)) is None or o < 0:
+            return False
+        elif o >= self.bitmap_limit:
+            return o in self.__sparse__
+        try:
+            return (self.__bits__[o >> 3] >> (o & 7)) & 1 == 1
+        except IndexError:
+            return False
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.__data__)
+
+    def __reversed__(self) -> Iterator[int]:
+        return reversed(self.__data__)
+
+    def copy(self) -> Self:
+        return self.__class__(self)
+
+    __copy__ = copy
+
+    def __or__(self, other) -> Self:
+        if other is self:
+            return self.__class__(self)
+        elif isinstance(other, Iterable):
+            clone = self.__class__(self)
+            clone._extend_(other)
+            return clone
+
+        return NotImplemented
+
+    def __ror__(self, other) -> Self:
+        if other is self:
+            return self.__class__(self)
+        elif isinstance(other, Iterable):
+            clone = self.__class__(other)
+            clone._extend_(self.__data__)
+            return clone
+
+        return NotImplemented
+
+    def __eq__(self, other):
+        if other is self:
+            return True
+        elif isinstance(other, intorderedset) and self.bitmap_limit == other.bitmap_limit:
+            return len(self) == len(other) \
+                and self.__sparse__ == other.__sparse__ \
+                and self.__bits__.rstrip(b'\0') == other.__bits__.rstrip(b'\0')
+        return super().__eq__(other)
+
+    def __getitem__(self, key: t.Union[int, slice]) -> t.Union[int, Self]:
+        if isinstance(key, int):
+            try:
+                return self.__data__[key]
+            except IndexError:
+                raise IndexError(f'index {key} out of range') from None
+        elif isinstance(key, slice):
+            return self.__class__(self.__data__[key])
+        raise ValueError(key)
+
+    at = __getitem__
+
+    def index(self, value, start=0, stop=None):
+        """S.index(value, [start, [stop]]) -> integer -- return first index of value.
+           Raises ValueError if the value is not present.
+        """
+        if value in self:
+            i = self.__data__.index(self._member_(value))
+            start, stop, _ = slice(start, stop).indices(len(self))
+            if start <= i < stop:
+                return i
+        raise ValueError(value)
+
+    def isdisjoint(self, other):
+        'Return True if two sets have a null intersection.'
+        return not any(v in self for v in other)
+
+    def clear(self):
+        self._reset_()
+
+    def add(self, value: int):
+        """Add an element."""
+        self._extend_((value,))
+
+    def remove(self, value: int):
+        """Remove an element. If not a member, raise a KeyError."""
+        if value not in self:
+            raise KeyError(value)
+        value = self._member_(value)
+        self.__data__.remove(value)
+        self._discard_(value)
+
+    def update(self, *iterables: Iterable[int]):
+        """Add an element."""
+        for it in iterables:
+            it is self or self._extend_(it)
+
+    def pop(self) -> int:
+        """Return the popped value.  Raise KeyError if empty."""
+        try:
+            value = self.__data__.pop()
+        except IndexError:
+            raise KeyError(f'pop from an empty {self.__class__.__name__}') from None
+        self._discard_(value)
+        return value
+
+    def __iand__(self, it) -> Self:
+        if it is self:
+            return self
+        elif isinstance(it, Iterable):
+            if not isinstance(it, (Set, Mapping)):
+                it = set(it)
+            self._reset_([v for v in self if v in it])
+            return self
+
+        return NotImplemented
+
+    def __ixor__(self, it) -> Self:
+        if it is self:
+            self.clear()
+            return self
+        elif isinstance(it, Iterable):
+            if not isinstance(it, (Set, Mapping)):
+                it = dict.fromkeys(it)
+            self._reset_([*(v for v in self if v not in it), *(v for v in it if v not in self)])
+            return self
+        return NotImplemented
+
+    def __isub__(self, it) -> Self:
+        if it is self:
+            self.clear()
+            return self
+        elif isinstance(it, Iterable):
+            if not isinstance(it, (Set, Mapping)):
+                it = set(it)
+            self._reset_([v for v in self if v not in it])
+            return self
+        return NotImplemented
+
+
+
 
 ################################################################################
 ### multidicts
@@ -1816,7 +2077,14 @@ class Arguments(t.Generic[_T_Args, _T_Kwargs]):
     def copy(self):
         return self.__class__(self._args, self._kwargs)
 
-    __copy__ = copy
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo=None):
+        args, kwargs = deepcopy(self._args, memo), deepcopy(self._kwargs, memo)
+        if args is self._args and kwargs is self._kwargs:
+            return self
+        return self.__class__(args, kwargs)
 
     def _hash_items_(self) -> None:
         return self._args, self._kwargs
@@ -273,7 +273,70 @@ def getitem(obj: _O, path: _P, default: _R = missing) -> _R:
             raise KeyPathError(key, path, obj)
 
     return target
-    
+
+
+
+@export()
+def pathgetter(path: _P, default: _R = missing) -> Callable[[_O], _R]:
+    """Compile `path` into a function that returns the value at `path` in the
+    given object.
+
+    Behaves like `getitem(obj, path, default)` but the path is only parsed
+    once and each segment is resolved by a specialised accessor.
+    """
+    steps = tuple(_segment_getter(sflag, key, path) for sflag, key, seg in DataPath(path))
+
+    if len(steps) == 1:
+        step, = steps
+        def get(obj):
+            if obj is not None and (rv := step(obj)) is not missing:
+                return rv
+            elif default is missing:
+                return getitem(obj, path)
+            return default
+    else:
+        def get(obj):
+            if obj is not None:
+                rv = obj
+                for step in steps:
+                    if (rv := step(rv)) is missing:
+                        break
+                else:
+                    return rv
+
+            if default is missing:
+                return getitem(obj, path)
+            return default
+
+    return get
+
+
+
+def _segment_getter(sflag: KindOfPath, key: _K, path: _P) -> Callable[[t.Any], t.Any]:
+    if sflag & _INDEX:
+        index = int(key)
+        def step(target):
+            if isinstance(target, Sequence):
+                return _getitem(target, index)
+            elif isinstance(target, Mapping):
+                return _getitem(target, key)
+            raise TypeError(f'invalid key={key!r} in {type(target)} from item path {path=!r}')
+    elif sflag & _ATTRIBUTE:
+        def step(target):
+            if target.__class__ is dict or isinstance(target, Mapping):
+                try:
+                    return target[key]
+                except (KeyError, IndexError):
+                    pass
+            return getattr(target, key, missing)
+    else:
+        def step(target):
+            if isinstance(target, Mapping):
+                return _getitem(target, key)
+            raise TypeError(f'invalid key={key!r} in {type(target)} from item path {path=!r}')
+
+    return step
+
 
 
 @export()
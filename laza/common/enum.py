@@ -146,7 +146,7 @@ class EnumMeta(BaseEnumMeta):
 
         data = attrs['__member_data__'] = {}
 
-        mnames = get_member_names(False, [])
+        mnames = [*get_member_names(False, [])]
         
         for i in range(len(mnames)):
             mname = mnames[i]	
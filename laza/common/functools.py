@@ -1,17 +1,25 @@
 from __future__ import annotations
 
+import os
 import sys
 import types
+import asyncio
 
 
 import typing as t
-from collections import ChainMap
+from collections import ChainMap, OrderedDict
 from collections.abc import Callable
+from concurrent.futures import Future
+from contextlib import contextmanager
 from typing_extensions import Self
+from cachetools.keys import hashkey, typedkey
 from warnings import warn
-from threading import Lock, RLock
+from itertools import count
+from threading import Lock, RLock, local
+from time import monotonic, perf_counter_ns
+from weakref import WeakKeyDictionary, WeakSet, ref as weakref
 from functools import (
-    lru_cache, update_wrapper, wraps, cache, 
+    lru_cache, update_wrapper, wraps, cache, partial,
     cached_property as base_cached_property
 )
 
@@ -30,6 +38,20 @@ __all__ = [
     'class_property', 
     'cached_class_property', 
     'cached_property', 
+    'slot_cached_property', 
+    'add_cached_slots', 
+    'async_cached_property', 
+    'async_cache', 
+    'hashkey', 
+    'typedkey', 
+    'memoize', 
+    'coalesce', 
+    'ProfileInfo', 
+    'ProfileStats', 
+    'ProfileRegistry', 
+    'profiler', 
+    'profiled', 
+    'report', 
     'lookup_property',
     'with_metaclass', 
     'add_metaclass',
@@ -134,45 +156,45 @@ class class_property(property, t.Generic[_T]):
 
 
 class cached_class_property(class_property[_T]):
-    """A decorator that converts a function into a lazy class property."""
-
-    # if t.TYPE_CHECKING:
-    #     fget = cache(lambda v: v)
+    """A decorator that converts a function into a lazy class property.
 
-    def __init__(self, func: t.Callable[..., _T]):
-        super().__init__(cache(func))
-    
-    
+    The value is computed once per class, so subclasses get their own values.
+    Values are weakly keyed by class and won't keep dynamically created 
+    classes alive. To discard a class's value::
 
-# class cached_class_property(class_property[T]):
-#     """A decorator that converts a function into a lazy class property."""
+            vars(Foo)['prop'].invalidate(Foo)
+    """
 
-#     def __init__(self, func: t.Callable[..., T]):
-#         super().__init__(func)
-#         self.lock = RLock()
-#         self.cache = weakref.WeakKeyDictionary()
+    def __init__(self, func: t.Callable[..., _T]):
+        super().__init__(func)
+        self.lock = RLock()
+        self.cache = WeakKeyDictionary()
 
-#     def __get__(self, obj, cls) -> T:
+    def __get__(self, obj, cls) -> _T:
+        try:
+            return self.cache[cls]
+        except KeyError:
+            pass
 
-#         # if self.has_cache_value(cls):
-#         #     return self.get_cache_value(cls)
+        with self.lock:
+            try:
+                return self.cache[cls]
+            except KeyError:
+                rv = self.cache[cls] = super().__get__(obj, cls)
+                return rv
 
-#         with self.lock:
-#             if self.has_cache_value(cls):
-#                 return self.get_cache_value(cls)
-#             else:
-#                 rv = super().__get__(obj, cls)
-#                 self.set_cache_value(cls, rv)
-#                 return rv
-                
-#     def get_cache_value(self, cls, default=...) -> T:
-#         return self.cache[cls]
+    def invalidate(self, cls: type) -> bool:
+        """Discard the cached value of given class. Returns `True` if a value 
+        was discarded or `False` otherwise.
+        """
+        with self.lock:
+            return self.cache.pop(cls, _MISSING) is not _MISSING
 
-#     def has_cache_value(self, cls) -> bool:
-#         return cls in self.cache
+    def clear(self):
+        """Discard the cached values of all classes."""
+        with self.lock:
+            self.cache.clear()
 
-#     def set_cache_value(self, cls, value: T):
-#         self.cache[cls] = value
 
 
 def _noop(*a):
@@ -220,6 +242,11 @@ class cached_property(base_cached_property[_T], property):
     By default: `del obj.attribute` deletes the cached value if present. Otherwise
     an AttributeError is raised. 
     The class has to have a `__dict__` in order for this property to work. 
+
+    Reading an already cached value is lock-free. Computing, setting or deleting 
+    the value holds a lock private to the instance so that different instances
+    never contend. Instances that can't be weakly referenced fall back to 
+    `nstripes` locks shared by id.
     """
 
     func: Callable[[t.Any], _T]
@@ -228,10 +255,15 @@ class cached_property(base_cached_property[_T], property):
     fset = None
     _fdel = None
     fdel = None
-    
+    locks: dict[int, tuple[weakref, RLock]]
+    stripes: tuple[RLock, ...]
+    nstripes: t.ClassVar[int] = 32
 
     def __init__(self, fget: Callable[[t.Any], _T]=_noop, /, fset=None, fdel=None, *, readonly=False):
         super().__init__(fget)
+        self.lock = RLock()
+        self.locks = {}
+        self.stripes = tuple(RLock() for _ in range(self.nstripes))
         self._fset = None
         self.fset = None
         self._fdel = None
@@ -254,9 +286,66 @@ class cached_property(base_cached_property[_T], property):
         self.fdel = self._get_fdel(func)
         return self
 
-    if t.TYPE_CHECKING:
-        def __get__(self, obj, typ = None) -> _T:
-            ...   
+    def instance_lock(self, instance) -> RLock:
+        """Return the lock of given instance. The lock is created on first use
+        and lives as long as the instance. Instances that can't be weakly 
+        referenced (e.g. slotted classes without `__weakref__`) get one of a 
+        fixed set of striped locks picked by their `id()`.
+        """
+        key = id(instance)
+        try:
+            ref, lock = self.locks[key]
+        except KeyError:
+            pass
+        else:
+            if ref() is instance:
+                return lock
+
+        with self.lock:
+            entry = self.locks.get(key)
+            if entry is None or entry[0]() is not instance:
+                try:
+                    entry = self.locks[key] = weakref(instance, partial(self._discard_lock, key)), RLock()
+                except TypeError:
+                    # ids are 16-byte aligned. Drop the low bits to spread them.
+                    return self.stripes[(key >> 4) % self.nstripes]
+            return entry[1]
+
+    def _discard_lock(self, key, ref):
+        with self.lock:
+            if (entry := self.locks.get(key)) is not None and entry[0] is ref:
+                del self.locks[key]
+
+    def __get__(self, obj, typ=None) -> _T:
+        if obj is None:
+            return self
+        elif self.attrname is None:
+            raise TypeError(
+                "Cannot use cached_property instance without calling __set_name__ on it."
+            )
+
+        try:
+            cache = obj.__dict__
+        except AttributeError:
+            raise TypeError(
+                f"No '__dict__' attribute on {type(obj).__name__!r} "
+                f"instance to cache {self.attrname!r} property."
+            ) from None
+
+        val = cache.get(self.attrname, _MISSING)
+        if val is _MISSING:
+            with self.instance_lock(obj):
+                val = cache.get(self.attrname, _MISSING)
+                if val is _MISSING:
+                    val = self.func(obj)
+                    try:
+                        cache[self.attrname] = val
+                    except TypeError:
+                        raise TypeError(
+                            f"The '__dict__' attribute on {type(obj).__name__!r} instance "
+                            f"does not support item assignment for caching {self.attrname!r} property."
+                        ) from None
+        return val
 
     def __set__(self, instance, val: _T):
         if not callable(self.fset):
@@ -264,7 +353,7 @@ class cached_property(base_cached_property[_T], property):
                 f'can\'t set readonly attribute {self.attrname!r}'
                 f' on {type(instance).__name__!r}.'
             )
-        with self.lock:
+        with self.instance_lock(instance):
             self._fset is None or instance.__dict__.pop(self.attrname, None)
             self.fset(instance, val)
 
@@ -274,7 +363,7 @@ class cached_property(base_cached_property[_T], property):
                 f'can\'t delete attribute {self.attrname!r}'
                 f' on {type(instance).__name__!r}.'
             )
-        with self.lock:
+        with self.instance_lock(instance):
             self._fdel is None or instance.__dict__.pop(self.attrname, None)
             self.fdel(instance)
 
@@ -346,19 +435,1012 @@ class cached_property(base_cached_property[_T], property):
     
     def __getstate__(self):
         rv = dict(self.__dict__)
-        del rv['lock']
+        rv.pop('lock', None)
+        rv.pop('locks', None)
+        rv.pop('stripes', None)
         return rv
     
     def __setstate__(self, state):
-        self.__dict__.update(state, lock=RLock())
+        self.__dict__.update(
+            state, 
+            lock=RLock(), 
+            locks={}, 
+            stripes=tuple(RLock() for _ in range(self.nstripes))
+        )
+
+
+
+
+class slot_cached_property(cached_property[_T]):
+    """A `cached_property` that caches the computed value in a dedicated slot
+    instead of the instance's `__dict__`. For use in classes with `__slots__`::
+
+            @add_cached_slots
+            class Foo(object):
+                    __slots__ = 'bar',
+
+                    @slot_cached_property
+                    def foo(self):
+                            # calculate something important here
+                            return 42
+
+    The slot, named `__cached_<name>__` by default, can either be declared
+    in the class's `__slots__` or be added by decorating the class with
+    `add_cached_slots`.
+
+    Setting and deleting values works the same way as in `cached_property`.
+    """
+
+    slotname: str = None
+
+    def __init__(self, fget: Callable[[t.Any], _T]=_noop, /, fset=None, fdel=None, *, readonly=False, slot: str=None):
+        self.slotname = slot
+        self.slot = None
+        super().__init__(fget, fset, fdel, readonly=readonly)
+
+    def __set_name__(self, owner, name):
+        super().__set_name__(owner, name)
+        if self.slotname is None:
+            self.slotname = f'__cached_{name}__'
+        self.slot = None
+
+    def _get_slot(self, owner):
+        slot = self.slot
+        if slot is None:
+            if self.attrname is None:
+                raise TypeError(
+                    "Cannot use slot_cached_property instance without calling __set_name__ on it."
+                )
+            slot = getattr(owner, self.slotname, None)
+            if not hasattr(slot, '__set__'):
+                raise TypeError(
+                    f'{owner.__name__!r} has no slot {self.slotname!r} to cache '
+                    f'{self.attrname!r} property. Add it to `__slots__` or decorate '
+                    f'the class with `add_cached_slots`.'
+                )
+            self.slot = slot
+        return slot
+
+    def __get__(self, obj, typ=None) -> _T:
+        if obj is None:
+            return self
+
+        slot = self.slot or self._get_slot(type(obj))
+        try:
+            return slot.__get__(obj, typ)
+        except AttributeError:
+            pass
+
+        with self.instance_lock(obj):
+            try:
+                return slot.__get__(obj, typ)
+            except AttributeError:
+                val = self.func(obj)
+                slot.__set__(obj, val)
+                return val
+
+    def __set__(self, instance, val: _T):
+        if not callable(self.fset):
+            raise AttributeError(
+                f'can\'t set readonly attribute {self.attrname!r}'
+                f' on {type(instance).__name__!r}.'
+            )
+        with self.instance_lock(instance):
+            self._fset is None or self._clear_slot(instance)
+            self.fset(instance, val)
+
+    def __delete__(self, instance):
+        if not callable(self.fdel):
+            raise AttributeError(
+                f'can\'t delete attribute {self.attrname!r}'
+                f' on {type(instance).__name__!r}.'
+            )
+        with self.instance_lock(instance):
+            self._fdel is None or self._clear_slot(instance)
+            self.fdel(instance)
+
+    def _clear_slot(self, instance):
+        try:
+            self._get_slot(type(instance)).__delete__(instance)
+        except AttributeError:
+            pass
+
+    def _get_fset(self, func=None):
+        if func is not None:
+            return func
+
+        descriptor = self
+
+        def fset(self, val):
+            descriptor._get_slot(type(self)).__set__(self, val)
+
+        fset.descriptor = descriptor
+        return fset
+
+    def _get_fdel(self, func=None):
+        if func is not None:
+            return func
+
+        descriptor = self
+
+        def fdel(self):
+            descriptor._clear_slot(self)
+
+        return fdel
+
+    def __getstate__(self):
+        rv = super().__getstate__()
+        rv['slot'] = None
+        return rv
+
+
+
+def add_cached_slots(cls: type[_T]) -> type[_T]:
+    """Class decorator that re-creates a class with `__slots__` with the slots
+    required by it's `slot_cached_property` attributes.
+    """
+    ns = cls.__dict__
+    if '__slots__' not in ns:
+        raise TypeError(f'{cls.__name__!r} does not define `__slots__`.')
+
+    slots = (ns['__slots__'],) if isinstance(ns['__slots__'], str) else tuple(ns['__slots__'])
+    extra = tuple(
+        v.slotname for v in ns.values()
+            if isinstance(v, slot_cached_property)
+                and v.slotname not in slots
+                and not hasattr(cls, v.slotname)
+    )
+    if not extra:
+        return cls
+
+    orig_vars = dict(ns)
+    for slots_var in slots:
+        orig_vars.pop(slots_var, None)
+    orig_vars.pop('__dict__', None)
+    orig_vars.pop('__weakref__', None)
+    orig_vars['__slots__'] = slots + extra
+    orig_vars['__qualname__'] = cls.__qualname__
+
+    rv = type(cls)(cls.__name__, cls.__bases__, orig_vars)
+
+    # Point the `__class__` cell used by zero-argument super() to the new class.
+    for v in orig_vars.values():
+        if isinstance(v, (classmethod, staticmethod)):
+            v = v.__func__
+        elif isinstance(v, property):
+            v = v.fget
+        for cell in getattr(v, '__closure__', None) or ():
+            try:
+                if cell.cell_contents is cls:
+                    cell.cell_contents = rv
+            except ValueError:
+                pass
+    return rv
+
+
+
+
+class _AsyncCacheEntry:
+    """A shared in-flight (or completed) task of an async cache."""
+
+    __slots__ = 'task', 'expires',
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.expires = None
+
+    def valid(self, now: float=None):
+        return self.expires is None or self.expires > (monotonic() if now is None else now)
+
+    async def result(self):
+        task = self.task
+        if task.done():
+            return task.result()
+        # shield the shared task so that a cancelled awaiter won't cancel it 
+        # for everyone else.
+        return await asyncio.shield(task)
+
+
+
+class async_cached_property(t.Generic[_T]):
+    """Transforms a coroutine method into an awaitable property whose result is 
+    computed once and cached for the life of the instance::
+
+            class Foo(object):
+
+                    @async_cached_property
+                    async def foo(self):
+                            # fetch something important here
+                            return 42
+
+            value = await Foo().foo
+
+    Concurrent awaiters of an uncached value share a single in-flight task. 
+    Failed or cancelled computations are not cached. To expire the cached 
+    value `ttl` seconds after it is computed::
+
+            class Foo(object):
+
+                    @async_cached_property(ttl=30).getter
+                    async def foo(self):
+                            ...
+
+    `del obj.attribute` discards the cached value if present.
+    The class has to have a `__dict__` in order for this property to work. 
+    """
+
+    attrname: str = None
+    func: Callable[[t.Any], t.Awaitable[_T]]
+    ttl: t.Union[float, None]
+
+    def __init__(self, func: Callable[[t.Any], t.Awaitable[_T]]=None, /, *, ttl: float=None):
+        self.ttl = ttl
+        func is None or self.getter(func)
+
+    def getter(self, func: Callable[[t.Any], t.Awaitable[_T]]):
+        self.func = func
+        self.__doc__ = func.__doc__
+        return self
+
+    def __set_name__(self, owner, name):
+        if self.attrname is None:
+            self.attrname = name
+        elif name != self.attrname:
+            raise TypeError(
+                "Cannot assign the same async_cached_property to two different names "
+                f"({self.attrname!r} and {name!r})."
+            )
+
+    def _get_cache(self, obj) -> dict:
+        if self.attrname is None:
+            raise TypeError(
+                "Cannot use async_cached_property instance without calling __set_name__ on it."
+            )
+        try:
+            return obj.__dict__
+        except AttributeError:
+            raise TypeError(
+                f"No '__dict__' attribute on {type(obj).__name__!r} "
+                f"instance to cache {self.attrname!r} property."
+            ) from None
+
+    def __get__(self, obj, typ=None) -> t.Awaitable[_T]:
+        if obj is None:
+            return self
+
+        cache = self._get_cache(obj)
+        entry: _AsyncCacheEntry = cache.get(self.attrname)
+        if entry is None or not entry.valid():
+            cache[self.attrname] = entry = _AsyncCacheEntry(asyncio.ensure_future(self.func(obj)))
+            entry.task.add_done_callback(partial(self._on_done, cache, entry))
+        return entry.result()
+
+    def _on_done(self, cache: dict, entry: _AsyncCacheEntry, task: asyncio.Future):
+        if task.cancelled() or task.exception() is not None:
+            if cache.get(self.attrname) is entry:
+                del cache[self.attrname]
+        elif self.ttl is not None:
+            entry.expires = monotonic() + self.ttl
+
+    def __set__(self, obj, value):
+        raise AttributeError(
+            f'can\'t set async cached attribute {self.attrname!r}'
+            f' on {type(obj).__name__!r}.'
+        )
+
+    def __delete__(self, obj):
+        self._get_cache(obj).pop(self.attrname, None)
+
+
+
+def async_cache(func: Callable[..., t.Awaitable[_T]]=None, /, *, maxsize: int=None, ttl: float=None):
+    """Memoize the results of a coroutine function.
+
+    Concurrent calls with the same arguments share a single in-flight task.
+    Failed or cancelled calls are not cached. Results expire `ttl` seconds 
+    after they are computed and at most `maxsize` results are kept, evicting 
+    the least recently used. Expired results are purged as new ones are added 
+    so the cache won't grow unbounded without a `maxsize`::
+
+            @async_cache(maxsize=128, ttl=60)
+            async def fetch(url):
+                    ...
+
+    The decorated function has a `cache_clear()` method to discard all cached
+    results.
+    """
+    
+    def decorator(fn: Callable[..., t.Awaitable[_T]]):
+        entries: OrderedDict[t.Hashable, _AsyncCacheEntry] = OrderedDict()
+        sweep_at = 64
+
+        def sweep():
+            # drop expired results once the cache doubles in size since the 
+            # last sweep. Keeps memory bounded without `maxsize` at an 
+            # amortized O(1) cost per insert.
+            nonlocal sweep_at
+            now = monotonic()
+            for key in [k for k, e in entries.items() if not e.valid(now)]:
+                del entries[key]
+            sweep_at = max(64, 2 * len(entries))
+
+        def on_done(key, entry: _AsyncCacheEntry, task: asyncio.Future):
+            if task.cancelled() or task.exception() is not None:
+                if entries.get(key) is entry:
+                    del entries[key]
+            elif ttl is not None:
+                entry.expires = monotonic() + ttl
+
+        @wraps(fn)
+        async def wrapper(*args, **kwds) -> _T:
+            key = hashkey(*args, **kwds)
+            entry = entries.get(key)
+            if entry is None or not entry.valid():
+                entries[key] = entry = _AsyncCacheEntry(asyncio.ensure_future(fn(*args, **kwds)))
+                entry.task.add_done_callback(partial(on_done, key, entry))
+                # replacing an expired entry keeps its old LRU position.
+                entries.move_to_end(key)
+                if ttl is not None and len(entries) >= sweep_at:
+                    sweep()
+                if maxsize is not None and len(entries) > maxsize:
+                    entries.popitem(last=False)
+            elif maxsize is not None:
+                entries.move_to_end(key)
+
+            return await entry.result()
+
+        wrapper.cache_clear = entries.clear
+        return wrapper
+
+    return decorator if func is None else decorator(func)
+
+
+
+
+class MemoizeInfo(t.NamedTuple):
+    hits: int
+    misses: int
+    maxsize: t.Union[int, None]
+    currsize: int
+    evictions: int
+
+
+
+class _MemoCache:
+    """The LRU/TTL cache of a `memoize` function or instance."""
+
+    __slots__ = 'data', 'currsize', 'owner', 'sweep_at',
+
+    data: OrderedDict[t.Hashable, tuple[t.Any, int, t.Union[float, None]]]
+
+    def __init__(self, owner: 'memoize'):
+        self.owner = owner
+        self.data = OrderedDict()
+        self.currsize = 0
+        self.sweep_at = 64
+
+    def get(self, key):
+        owner = self.owner
+        with owner.lock:
+            item = self.data.get(key)
+            if item is not None:
+                if item[2] is None or item[2] > monotonic():
+                    owner.hits += 1
+                    self.data.move_to_end(key)
+                    return item[0]
+                self.evict(key)
+            owner.misses += 1
+            return _MISSING
+
+    def set(self, key, value):
+        owner = self.owner
+        size = 1 if owner.getsizeof is None else owner.getsizeof(value)
+        maxsize = owner.maxsize
+        if maxsize is not None and size > maxsize:
+            return
+
+        expires = None if owner.ttl is None else monotonic() + owner.ttl
+        with owner.lock:
+            key in self.data and self.pop(key)
+            self.data[key] = value, size, expires
+            self.currsize += size
+            owner.currsize += size
+            if expires is not None and len(self.data) >= self.sweep_at:
+                self.sweep()
+            if maxsize is not None:
+                while self.currsize > maxsize:
+                    self.evict(next(iter(self.data)))
+
+    def pop(self, key):
+        size = self.data.pop(key)[1]
+        self.currsize -= size
+        self.owner.currsize -= size
+
+    def evict(self, key):
+        self.pop(key)
+        self.owner.evictions += 1
+
+    def sweep(self):
+        # evict expired results once the cache doubles in size since the last
+        # sweep. Results that are never read again would otherwise stay 
+        # forever without a `maxsize`.
+        now = monotonic()
+        for key in [k for k, v in self.data.items() if v[2] <= now]:
+            self.evict(key)
+        self.sweep_at = max(64, 2 * len(self.data))
+
+    def clear(self, predicate: Callable[[t.Hashable, t.Any], bool]=None):
+        with self.owner.lock:
+            if predicate is None:
+                self.owner.currsize -= self.currsize
+                self.currsize = 0
+                self.data.clear()
+            else:
+                for key in [k for k, v in self.data.items() if predicate(k, v[0])]:
+                    self.pop(key)
+
+
+
+class memoize(t.Generic[_T]):
+    """Memoize the results of a function::
+
+            @memoize(maxsize=128, ttl=60)
+            def fetch(url):
+                    ...
+
+    Args:
+        maxsize: the maximum size of the cache. Least recently used results are 
+            evicted once exceeded. Defaults to `None` (unbounded).
+        ttl: number of seconds results remain valid. Defaults to `None` 
+            (forever).
+        key: callable that returns the cache key of the call's arguments. 
+            Defaults to `hashkey`.
+        getsizeof: callable that returns the size of a result. When given, 
+            `maxsize` limits the sum of the sizes of cached results instead of 
+            their count. e.g. `memoize(maxsize=2**20, getsizeof=sys.getsizeof)`
+
+    When used on methods, results are cached per instance and only a weak 
+    reference to the instance is kept. The instance must therefore support 
+    weak references. `maxsize` applies to each instance's cache.
+
+    Call `cache_info()` to get the `hits`, `misses`, `maxsize`, `currsize` and 
+    `evictions` stats and `cache_clear(predicate)` to discard results for which
+    `predicate(key, value)` is true, or all results if predicate is `None`.
+    """
+
+    __wrapped__: Callable[..., _T]
+
+    func: Callable[..., _T]
+    maxsize: t.Union[int, None]
+    ttl: t.Union[float, None]
+    key: Callable[..., t.Hashable]
+    getsizeof: t.Union[Callable[[_T], int], None]
+
+    @t.overload
+    def __new__(cls, func: Callable[..., _T], /, *, maxsize: int=None, ttl: float=None, key: Callable[..., t.Hashable]=hashkey, getsizeof: Callable[[_T], int]=None) -> 'memoize[_T]':
+        ...
+    @t.overload
+    def __new__(cls, *, maxsize: int=None, ttl: float=None, key: Callable[..., t.Hashable]=hashkey, getsizeof: Callable[[_T], int]=None) -> Callable[[Callable[..., _T]], 'memoize[_T]']:
+        ...
+    def __new__(cls, func: Callable[..., _T]=..., /, **kwds):
+        if func is ...:
+            def decorate(func):
+                return cls(func, **kwds)
+            return decorate
+        return super().__new__(cls)
+
+    def __init__(self, func: Callable[..., _T], /, *, maxsize: int=None, ttl: float=None, key: Callable[..., t.Hashable]=hashkey, getsizeof: Callable[[_T], int]=None):
+        self.func = func
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.key = key
+        self.getsizeof = getsizeof
+        self.lock = RLock()
+        self.hits = self.misses = self.currsize = self.evictions = 0
+        self.cache = _MemoCache(self)
+        self.instances: dict[int, tuple[weakref, _MemoCache]] = {}
+        update_wrapper(self, func)
+
+    def __call__(self, *args, **kwds) -> _T:
+        return self._call(self.cache, args, kwds)
+
+    def __get__(self, obj, typ=None):
+        if obj is None:
+            return self
+        return types.MethodType(self._call_method, obj)
+
+    def _call(self, cache: _MemoCache, args, kwds, bound=()):
+        key = self.key(*args, **kwds)
+        val = cache.get(key)
+        if val is _MISSING:
+            val = self.func(*bound, *args, **kwds)
+            cache.set(key, val)
+        return val
+
+    def _call_method(self, obj, /, *args, **kwds):
+        ident = id(obj)
+        entry = self.instances.get(ident)
+        if entry is None or entry[0]() is not obj:
+            with self.lock:
+                entry = self.instances.get(ident)
+                if entry is None or entry[0]() is not obj:
+                    entry = self.instances[ident] = weakref(obj, partial(self._discard, ident)), _MemoCache(self)
+        return self._call(entry[1], args, kwds, (obj,))
+
+    def _discard(self, ident, ref):
+        with self.lock:
+            entry = self.instances.get(ident)
+            if entry is not None and entry[0] is ref:
+                del self.instances[ident]
+                self.currsize -= entry[1].currsize
+
+    def cache_info(self) -> MemoizeInfo:
+        return MemoizeInfo(self.hits, self.misses, self.maxsize, self.currsize, self.evictions)
+
+    def cache_clear(self, predicate: Callable[[t.Hashable, t.Any], bool]=None):
+        """Discard the cached results for which `predicate(key, value)` is `True`
+        or all results if `predicate` is `None`.
+        """
+        with self.lock:
+            self.cache.clear(predicate)
+            for _, cache in list(self.instances.values()):
+                cache.clear(predicate)
+            if predicate is None:
+                self.hits = self.misses = self.evictions = 0
+
+
+
+
+class CoalesceInfo(t.NamedTuple):
+    calls: int
+    coalesced: int
+    inflight: int
+
+
+
+def coalesce(func: Callable[..., _T]=None, /, *, key: Callable[..., t.Hashable]=hashkey):
+    """Coalesce concurrent calls of a function with the same arguments into a 
+    single execution whose result (or error) is shared by all callers::
+
+            @coalesce
+            def reload_config(name):
+                    ...
+
+    Works with both regular functions called from multiple threads and 
+    coroutine functions. Nothing is cached: a call made after the shared 
+    execution completes starts a new one.
+    
+    The decorated function has a `coalesce_info()` method that returns the 
+    number of `calls`, the number of `coalesced` calls that joined an 
+    execution started by another caller, and the number of executions 
+    currently `inflight`.
+    """
+    
+    def decorator(fn: Callable[..., _T]):
+        inflight = {}
+        stats = [0, 0]
+        
+        if asyncio.iscoroutinefunction(fn):
+            async def run(k, args, kwds):
+                try:
+                    return await fn(*args, **kwds)
+                finally:
+                    del inflight[k]
+
+            @wraps(fn)
+            async def wrapper(*args, **kwds) -> _T:
+                k = key(*args, **kwds)
+                stats[0] += 1
+                task = inflight.get(k)
+                if task is None:
+                    task = inflight[k] = asyncio.ensure_future(run(k, args, kwds))
+                else:
+                    stats[1] += 1
+                # shield the shared task so that a cancelled caller won't cancel 
+                # it for everyone else.
+                return await asyncio.shield(task)
+        else:
+            lock = Lock()
+
+            @wraps(fn)
+            def wrapper(*args, **kwds) -> _T:
+                k = key(*args, **kwds)
+                with lock:
+                    stats[0] += 1
+                    fut = inflight.get(k)
+                    if leader := fut is None:
+                        fut = inflight[k] = Future()
+                    else:
+                        stats[1] += 1
+
+                if not leader:
+                    return fut.result()
+
+                try:
+                    rv = fn(*args, **kwds)
+                except BaseException as e:
+                    with lock:
+                        del inflight[k]
+                    fut.set_exception(e)
+                    raise
+                else:
+                    with lock:
+                        del inflight[k]
+                    fut.set_result(rv)
+                    return rv
+
+        wrapper.coalesce_info = lambda: CoalesceInfo(stats[0], stats[1], len(inflight))
+        return wrapper
+
+    return decorator if func is None else decorator(func)
+
+
+
+
+class ProfileInfo(t.NamedTuple):
+    name: str
+    calls: int
+    sampled: int
+    total: int
+    min: int
+    max: int
+    percentiles: dict[float, int]
+    histogram: tuple[tuple[int, int], ...]
+
+
+
+_HIST_BITS = 3 # 8 sub-buckets per power of 2, i.e. ~12.5% precision.
+
+
+def _hist_index(ns: int) -> int:
+    if (shift := ns.bit_length() - _HIST_BITS - 1) <= 0:
+        return ns
+    return (shift << _HIST_BITS) + (ns >> shift)
+
+
+def _hist_upper(index: int) -> int:
+    if index < 2 << _HIST_BITS:
+        return index
+    shift = (index >> _HIST_BITS) - 1
+    return ((index & ((1 << _HIST_BITS) - 1) | 1 << _HIST_BITS) + 1 << shift) - 1
+
+
+
+class ProfileStats:
+    """Call counts, cumulative time and a log-linear (HDR style) latency 
+    histogram of a `profiled` call site. All times are in nanoseconds.
+    """
+
+    __slots__ = 'name', 'stride', 'calls', 'sampled', 'total', 'min', 'max', 'buckets', 'lock',
+
+    def __init__(self, name: str, sample: float=1.0):
+        if not 0 < sample <= 1:
+            raise ValueError(f'sample rate must be in (0, 1]. Got {sample!r}.')
+        self.name = name
+        self.stride = max(1, round(1 / sample))
+        self.lock = Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.calls = self.sampled = self.total = self.max = 0
+            self.min = None
+            self.buckets: dict[int, int] = {}
+
+    def record(self, ns: int):
+        i = _hist_index(ns)
+        with self.lock:
+            self.sampled += 1
+            self.total += ns
+            if self.min is None or ns < self.min:
+                self.min = ns
+            if ns > self.max:
+                self.max = ns
+            self.buckets[i] = self.buckets.get(i, 0) + 1
+
+    def percentile(self, q: float) -> int:
+        """Return the upper bound of the bucket holding the `q`th percentile."""
+        with self.lock:
+            return self._percentile(sorted(self.buckets.items()), q)
+
+    def _percentile(self, buckets, q):
+        if not self.sampled:
+            return 0
+        rank, seen = q / 100 * self.sampled, 0
+        for i, n in buckets:
+            seen += n
+            if seen >= rank:
+                break
+        return min(_hist_upper(i), self.max)
+
+    def info(self, percentiles: t.Iterable[float]=(50, 90, 99, 99.9)) -> ProfileInfo:
+        with self.lock:
+            buckets = sorted(self.buckets.items())
+            return ProfileInfo(
+                self.name, self.calls, self.sampled, self.total, self.min or 0, self.max,
+                { q: self._percentile(buckets, q) for q in percentiles },
+                tuple((_hist_upper(i), n) for i, n in buckets),
+            )
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__}: {self.name!r} calls={self.calls}>'
+
+
+
+class ProfileRegistry:
+    """A registry of `profiled` call sites. 
+
+    Profiling can be switched on or off at runtime with `enable()` and 
+    `disable()`. The initial state is read from the environment variable 
+    given by `envvar` (`LAZA_PROFILE` by default). When disabled, a profiled 
+    function runs the original function's code directly. The wrapper's 
+    `__code__` is swapped on toggle so no indirection is left behind. Other 
+    callables (e.g. partials or `lru_cache` wrappers) get a plain wrapper 
+    that calls them directly when disabled.
+    """
+
+    envvar: t.ClassVar[str] = 'LAZA_PROFILE'
+
+    def __init__(self, enabled: bool=None, *, sample: float=1.0):
+        if enabled is None:
+            enabled = os.environ.get(self.envvar, '').lower() in ('1', 'true', 'yes', 'on')
+        self.enabled = bool(enabled)
+        self.sample = sample
+        self.stats: dict[str, ProfileStats] = {}
+        self.lock = Lock()
+        self._profiled: WeakSet[types.FunctionType] = WeakSet()
+
+    def enable(self):
+        self._switch(True)
+
+    def disable(self):
+        self._switch(False)
+
+    def _switch(self, enabled: bool):
+        with self.lock:
+            self.enabled = enabled
+            for func in list(self._profiled):
+                func.__profile_switch__(enabled)
+
+    def reset(self):
+        with self.lock:
+            stats = list(self.stats.values())
+        for s in stats:
+            s.reset()
+
+    def report(self, *, reset: bool=False, percentiles: t.Iterable[float]=(50, 90, 99, 99.9)) -> dict[str, ProfileInfo]:
+        """Return a snapshot of all profiled call sites keyed by name."""
+        with self.lock:
+            stats = list(self.stats.values())
+        rv = { s.name: s.info(percentiles) for s in stats }
+        reset and self.reset()
+        return rv
+
+    def profiled(self, func: Callable[..., _T]=None, /, *, name: str=None, sample: float=None):
+        def decorator(fn: Callable[..., _T]) -> Callable[..., _T]:
+            key = name or _profile_name(fn)
+            with self.lock:
+                stats = self.stats.get(key)
+                if stats is None:
+                    stats = self.stats[key] = ProfileStats(key, sample or self.sample)
+
+            is_async = asyncio.iscoroutinefunction(fn)
+            timed = _timed_async(fn, stats) if is_async else _timed(fn, stats)
+
+            if isinstance(fn, types.FunctionType):
+                wrapper, switch = _profiled_clone(fn, timed, is_async)
+            else:
+                wrapper, switch = _profiled_wrapper(fn, timed, is_async)
+
+            wrapper.__profile__ = stats
+            wrapper.__profile_switch__ = switch
+            with self.lock:
+                switch(self.enabled)
+                self._profiled.add(wrapper)
+
+            return wrapper
+
+        return decorator if func is None else decorator(func)
+
+
+
+def _profile_name(fn) -> str:
+    qualname = getattr(fn, '__qualname__', None)
+    if qualname is None:
+        # e.g. partials
+        fn = getattr(fn, 'func', type(fn))
+        qualname = getattr(fn, '__qualname__', None) or repr(fn)
+    return f'{getattr(fn, "__module__", None)}.{qualname}'
+
+
+def _profiled_clone(fn: types.FunctionType, timed, is_async: bool):
+    # a clone of `fn` whose code is swapped for a call to `timed` 
+    # while enabled and restored to `fn`'s own code when disabled.
+    code, kwdefaults = fn.__code__, fn.__kwdefaults__
+    wrapper = types.FunctionType(code, fn.__globals__, fn.__name__, fn.__defaults__, fn.__closure__)
+    update_wrapper(wrapper, fn)
+    profiled_code = _profiled_code(len(code.co_freevars), is_async)
+
+    def switch(enabled):
+        if enabled:
+            wrapper.__code__ = profiled_code
+            wrapper.__kwdefaults__ = { '__timed__': timed }
+        else:
+            wrapper.__code__ = code
+            wrapper.__kwdefaults__ = kwdefaults and { **kwdefaults }
+
+    return wrapper, switch
+
+
+def _profiled_wrapper(fn: Callable, timed, is_async: bool):
+    # callables other than plain functions have no `__code__` to swap. Call
+    # either `timed` or `fn` through a plain wrapper.
+    target = fn
+
+    if is_async:
+        @wraps(fn)
+        async def wrapper(*args, **kwds):
+            return await target(*args, **kwds)
+    else:
+        @wraps(fn)
+        def wrapper(*args, **kwds):
+            return target(*args, **kwds)
+
+    def switch(enabled):
+        nonlocal target
+        target = timed if enabled else fn
+
+    return wrapper, switch
+
+
+
+@cache
+def _profiled_code(nfree: int, is_async: bool) -> types.CodeType:
+    # `__code__` can only be replaced by code with as many free variables as
+    # the function's closure has cells. The dummy ones are never read.
+    cells = [f'_cell_{i}' for i in range(nfree)]
+    src = (
+        f'def __create_fn__():\n'
+        f'  {" = ".join(cells) or "_"} = None\n'
+        f'  {"async def" if is_async else "def"} wrapper(*args, __timed__, **kwds):\n'
+        f'    if 0: {", ".join(cells) or "pass"}\n'
+        f'    return {"await " if is_async else ""}__timed__(*args, **kwds)\n'
+        f'  return wrapper\n'
+    )
+    ns = {}
+    exec(src, ns)
+    return ns['__create_fn__']().__code__
+
+
+def _timed(fn, stats: ProfileStats):
+    stride = stats.stride
+    def timed(*args, **kwds):
+        stats.calls = n = stats.calls + 1
+        if n % stride:
+            return fn(*args, **kwds)
+        start = perf_counter_ns()
+        try:
+            return fn(*args, **kwds)
+        finally:
+            stats.record(perf_counter_ns() - start)
+    return timed
+
+
+def _timed_async(fn, stats: ProfileStats):
+    stride = stats.stride
+    async def timed(*args, **kwds):
+        stats.calls = n = stats.calls + 1
+        if n % stride:
+            return await fn(*args, **kwds)
+        start = perf_counter_ns()
+        try:
+            return await fn(*args, **kwds)
+        finally:
+            stats.record(perf_counter_ns() - start)
+    return timed
+
+
+
+profiler = ProfileRegistry()
+
+
+def profiled(func: Callable[..., _T]=None, /, *, name: str=None, sample: float=None):
+    """Record call counts, cumulative time and a latency histogram of the 
+    decorated function in the default `profiler` registry::
+
+            @profiled(sample=.1)
+            def parse(text):
+                ...
+
+            report()['mymodule.parse'].percentiles[99]
+
+    `sample` is the fraction of calls that are timed, all calls are counted.
+    Counts may be approximate under heavy thread contention.
+    """
+    return profiler.profiled(func, name=name, sample=sample)
+
+
+def report(*, reset: bool=False, percentiles: t.Iterable[float]=(50, 90, 99, 99.9)) -> dict[str, ProfileInfo]:
+    """Return a snapshot of all call sites profiled by the default `profiler`."""
+    return profiler.report(reset=reset, percentiles=percentiles)
+
+
+
+
+class _instance_method_decorator:
+    """Method descriptor that applies `decorate` to the method once per 
+    instance on first access. 
+    
+    The decorated bound functions are cached on the descriptor, weakly keyed 
+    by instance, leaving the instance's `__dict__` untouched so that copying,
+    pickling and comparing instances are unaffected. The bound function only 
+    holds a weak reference to its instance.
+    """
+
+    def __init__(self, func, decorate, name=None):
+        self.func = func
+        self.decorate = decorate
+        self.attrname = name
+        self.lock = RLock()
+        self.instances: dict[int, tuple[weakref, Callable]] = {}
+        update_wrapper(self, func)
+
+    def __set_name__(self, owner, name):
+        if self.attrname is None:
+            self.attrname = name
+        elif name != self.attrname:
+            raise TypeError(
+                "Cannot assign the same method_decorator to two different names "
+                f"({self.attrname!r} and {name!r})."
+            )
+
+    def __get__(self, obj, typ=None):
+        if obj is None:
+            return self
         
+        ident = id(obj)
+        entry = self.instances.get(ident)
+        if entry is None or entry[0]() is not obj:
+            with self.lock:
+                entry = self.instances.get(ident)
+                if entry is None or entry[0]() is not obj:
+                    try:
+                        ref = weakref(obj, partial(self._discard, ident))
+                    except TypeError:
+                        raise TypeError(
+                            f"Cannot use a per-instance method_decorator on {type(obj).__name__!r} "
+                            f"instances that don't support weak references."
+                        ) from None
+                    entry = self.instances[ident] = ref, self._bind(ref)
+        return entry[1]
+
+    def _discard(self, ident, ref):
+        with self.lock:
+            entry = self.instances.get(ident)
+            if entry is not None and entry[0] is ref:
+                del self.instances[ident]
+
+    def _bind(self, ref):
+        func = self.func
 
+        @wraps(func)
+        def bound_func(*args, **kwargs):
+            obj = ref()
+            return func.__get__(obj, type(obj))(*args, **kwargs)
+        return self.decorate(bound_func)
 
 
 
-def method_decorator(decorator, name=''):
+
+def method_decorator(decorator, name='', *, per_instance=False):
     """
     Convert a function decorator into a method decorator
+
+    By default the decorator is re-applied to a closure over `self` on every
+    call. With `per_instance=True` the decorator is instead applied once per 
+    instance on first access and the result is cached on the descriptor, 
+    weakly keyed by instance, so decorators that keep state (e.g. caches) 
+    keep it per instance and calls skip re-applying the decorator.
     """
     # 'obj' can be a class or a function. If 'obj' is a function at the time it
     # is passed to _dec,  it will eventually be a method of the class it is
@@ -396,6 +1478,13 @@ def method_decorator(decorator, name=''):
                 return function
             return decorator(function)
 
+        if per_instance:
+            _wrapper = _instance_method_decorator(func, decorate, name or None)
+            if is_class:
+                setattr(obj, name, _wrapper)
+                return obj
+            return _wrapper
+
         def _wrapper(self, *args, **kwargs):
             @decorate
             def bound_func(*args2, **kwargs2):
@@ -446,7 +1535,7 @@ class lookup_property(*__LookupBases, t.Generic[_T_Look]):
     __slots__ = (
         'name', 'src', 
         'default', 'read_only', 'doc',
-        'fget', 'fset', 'fdel', 'flook'
+        'fget', 'fset', 'fdel', 'flook', 'faccess',
     )
 
     # def __subclasscheck__(self, subclass: type) -> bool:
@@ -475,21 +1564,39 @@ class lookup_property(*__LookupBases, t.Generic[_T_Look]):
     def __set_name__(self, owner, name):
         if not hasattr(self, 'name'):
             self.name = name
+        self._compile()
 
     def __get__(self, obj, type=None) -> _T_Look:
         if obj is None:
             return self
+        return (self.faccess or self._compile())(obj)
 
-        from .data import getitem
-        
-        rv = getitem(self.flook(obj), self.name, self.default)
+    def _compile(self):
+        from .data import pathgetter
+
+        name, fget = self.name, self.fget
+        fvalue = pathgetter(name, self.default)
         
-        if rv is ...:
-            raise AttributeError(self.name)
+        if self.flook is _selflookup:
+            getvalue = fvalue
         else:
-            if self.fget is not None:
-                rv = self.fget(obj, rv)
-            return rv
+            flook = self.flook
+            def getvalue(obj):
+                return fvalue(flook(obj))
+
+        if fget is None:
+            def faccess(obj):
+                if (rv := getvalue(obj)) is ...:
+                    raise AttributeError(name)
+                return rv
+        else:
+            def faccess(obj):
+                if (rv := getvalue(obj)) is ...:
+                    raise AttributeError(name)
+                return fget(obj, rv)
+
+        self.faccess = faccess
+        return faccess
 
     def __set__(self, obj, value):
         if self.read_only:
@@ -520,22 +1627,20 @@ class lookup_property(*__LookupBases, t.Generic[_T_Look]):
 
     def getter(self, fget):
         self.fget = fget
+        self.faccess = None
         return self
 
     def looker(self, source):
         self.src = source
+        self.faccess = None
 
         if source == 'self':
             self.flook = _selflookup
         elif callable(source):
             self.flook = source
         else:
-            from .data import getitem
-
-            def flook(obj):
-                return getitem(obj, self.src)
-
-            self.flook = flook
+            from .data import pathgetter
+            self.flook = pathgetter(source)
 
         return self
     
@@ -767,19 +1872,111 @@ def calling_frame(depth=1, *, globals: bool=None, locals: bool=None, chain: bool
 
 
 
+@export
+class idgenerator:
+    """A lock-free, thread-safe generator of unique integer ids.
+
+    Each thread claims blocks of `blocksize` sequence numbers from a shared 
+    `itertools.count` and hands out ids from its block without any locking.
+    Ids are unique but only increase monotonically within a thread.
+
+    To keep ids unique across processes, give a `node` (or a callable 
+    returning one, e.g. a worker index) of at most `nodebits` bits. It is 
+    added as a prefix above the lower `seqbits` bits of every id. With 
+    `fork_safe=True` the generator is reseeded in forked children. A callable
+    `node` is re-evaluated there, otherwise the process id (modulo 
+    `2**pidbits`) is folded into the prefix below `node`.
+
+    Ids fit in 63 bits. `seqbits` defaults to the bits left over by the 
+    prefix.
+    """
+
+    __slots__ = 'node', 'offset', 'blocksize', 'seqbits', 'nodebits', 'pidbits', 'fork_safe', '_blocks', '_local', '__weakref__'
+
+    maxbits: t.ClassVar[int] = 63
+
+    def __init__(self, node: t.Union[int, Callable[[], int], None]=None, *, blocksize: int=1024, seqbits: int=None, nodebits: int=12, pidbits: int=16, fork_safe: bool=False):
+        if not fork_safe or callable(node):
+            pidbits = 0
+        if seqbits is None:
+            seqbits = self.maxbits - nodebits - pidbits
+        if min(nodebits, pidbits) < 0 or nodebits + pidbits + seqbits > self.maxbits:
+            raise ValueError(
+                f'`nodebits`, `pidbits` and `seqbits` must fit in {self.maxbits} bits. '
+                f'Got {nodebits}, {pidbits} and {seqbits}.'
+            )
+        elif blocksize < 1 or blocksize >= 1 << seqbits:
+            raise ValueError(f'`blocksize` must be between 1 and 2**seqbits. Got {blocksize!r}.')
+
+        self.node = node
+        self.blocksize = blocksize
+        self.seqbits = seqbits
+        self.nodebits = nodebits
+        self.pidbits = pidbits
+        self.fork_safe = fork_safe
+        self.reseed()
+        if fork_safe:
+            os.register_at_fork(after_in_child=partial(self._reseed_ref, weakref(self)))
+
+    def __call__(self) -> int:
+        try:
+            return next(self._local.block)
+        except (AttributeError, StopIteration):
+            return self._claim()
+
+    def __iter__(self):
+        return iter(self, None)
+
+    def _claim(self):
+        start = next(self._blocks) * self.blocksize
+        if start + self.blocksize >= 1 << self.seqbits:
+            raise OverflowError(f'{self!r} ran out of ids.')
+        start += self.offset + 1
+        self._local.block = block = iter(range(start, start + self.blocksize))
+        return next(block)
+
+    def reseed(self):
+        """Discard all claimed blocks and restart the sequence. 
+        
+        Re-evaluates `node` if it is callable.
+        """
+        node = (self.node() if callable(self.node) else self.node) or 0
+        if not 0 <= node < 1 << self.nodebits:
+            raise ValueError(f'`node` must fit in {self.nodebits} bits. Got {node!r}.')
+        
+        pid = os.getpid() & ((1 << self.pidbits) - 1)
+        self.offset = (node << self.pidbits | pid) << self.seqbits
+        self._blocks = count()
+        self._local = local()
+
+    def _resume(self, prev: 'idgenerator'):
+        # continue the sequence after the blocks claimed from `prev`.
+        claimed = next(prev._blocks) * prev.blocksize
+        self._blocks = count(-(-claimed // self.blocksize))
+
+    @staticmethod
+    def _reseed_ref(ref):
+        if (self := ref()) is not None:
+            self.reseed()
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}(node={self.node!r})'
+
+
+
+
 @export
 class uniqueid(int):
 
     __slots__ = ()
 
     __ns = None
-    __lock = Lock()
-    __last = 0
+    __ids = idgenerator()
+    __config = None, {}
 
     def __new__(cls: type[Self], fmt: str=None) -> Self:
-        with cls.__lock:
-            cls.__last = uid = int.__new__(cls, cls.__last + 1)
-            return fmt.format(uid) if fmt else uid
+        uid = int.__new__(cls, cls.__ids())
+        return fmt.format(uid) if fmt else uid
     
     def __repr__(self) -> str:
         ns = '' if self.__ns is None else f'{self.__ns}'
@@ -788,6 +1985,30 @@ class uniqueid(int):
     def __str__(self) -> str:
         return str(int(self))
 
+    @classmethod
+    def configure(cls, node: t.Union[int, Callable[[], int], None]=None, **kwds):
+        """Replace the id generator of this namespace. When called on the root
+        `uniqueid`, namespaces that were not configured separately are 
+        reconfigured too and new namespaces inherit the settings. The new 
+        generators continue the sequence so ids are never issued twice.
+        
+        Takes the same arguments as `idgenerator`.
+        """
+        cls.__config = node, kwds
+        cls.__reconfigure(node, kwds)
+        if cls.__ns is None:
+            for sub in cls.__subclasses__():
+                if '_uniqueid__config' not in sub.__dict__:
+                    sub.__reconfigure(node, kwds)
+
+    @classmethod
+    def __reconfigure(cls, node, kwds):
+        # carry the sequence over so that ids handed out before are not 
+        # issued again.
+        ids = idgenerator(node, **kwds)
+        ids._resume(cls.__ids)
+        cls.__ids = ids
+
     @classmethod
     @cache
     def __class_getitem__(cls, ns):
@@ -796,10 +2017,12 @@ class uniqueid(int):
         elif ns == cls.__ns:
             return cls
         
+        node, kwds = cls.__config
+        ids = idgenerator(node, **kwds)
+
         class uniqueid(cls):
             __ns = ns
-            __lock = Lock()
-            __last = 0
+            __ids = ids
 
         return uniqueid
 
@@ -809,7 +2032,6 @@ class uniqueid(int):
 
 
 
-
 class VoidType:
 
     __slots__ = '__name__',
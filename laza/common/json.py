@@ -16,13 +16,17 @@ from enum import IntFlag, unique
 from functools import partial, reduce
 from laza.common.collections import fallbackdict
 from laza.common.functools import export
+from laza.common.proxy import isproxytype, unproxy
 
 
 T_Jsonable = t.TypeVar('T_Jsonable', bound='Jsonable', covariant=True)
 
 
 def _get_default_encoder(typ):
-    if hasattr(typ, '__json__'):
+    if isproxytype(typ):
+        # orjson natively encodes the resolved target returned by `unproxy`.
+        __type_defaults[typ] = unproxy
+    elif hasattr(typ, '__json__'):
         __type_defaults[typ] = typ.__json__
     elif issubclass(typ, Mapping):
         __type_defaults[typ] = dict
@@ -138,7 +142,7 @@ class JsonOpt(IntFlag):
 
 
 def to_jsonable(o):
-    enc = __type_defaults[o.__class__]
+    enc = __type_defaults[type(o)]
     if enc is None:
         raise TypeError(o)
     return enc(o) 
@@ -148,7 +152,7 @@ def to_jsonable(o):
 def _get_default_fn(default=None):
     if default is not None:
         def _to_jsonable(o): 
-            return (__type_defaults[o.__class__] or default)(o)
+            return (__type_defaults[type(o)] or default)(o)
         return _to_jsonable
     return to_jsonable
 
@@ -160,6 +164,9 @@ def dumps(obj: Jsonable, default: t.Callable[[t.Any], Jsonable]=None, opts: Json
     """Serialize ``obj`` to a JSON formatted ``bytes``
     Uses ``orjson`` if available or falls back to the standard ``json`` library.
     """
+    if isproxytype(type(obj)):
+        obj = unproxy(obj)
+
     if opts & JsonOpt.DECODE:
         opts = opts & JsonOpt.ORJSON_OPT
         return orjson.dumps(obj, _get_default_fn(default), int(opts)).decode()
@@ -1,24 +1,33 @@
+import asyncio
+import atexit
+import sys
+import traceback
 from abc import ABC, ABCMeta, abstractmethod
-from collections import defaultdict
-from functools import reduce
-from itertools import repeat, zip_longest
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from concurrent.futures import Executor, Future as ConcurrentFuture, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial, reduce
+from itertools import count, repeat, zip_longest
 from logging import getLogger
 from os import stat
-from threading import Lock
+from math import ceil
+from threading import BoundedSemaphore, Condition, Lock, RLock, Thread, local
+from time import monotonic, perf_counter_ns
 from types import FunctionType, LambdaType, MethodType
+from weakref import WeakSet
 import typing as t
 
 from collections.abc import Callable
 from typing_extensions import Self
 
 from laza.common.enum import BitSetFlag, auto
-from laza.common.functools import class_only_property, cache, class_only_method
+from laza.common.functools import class_only_property, cache, class_only_method, ProfileInfo, ProfileStats
 
 from laza.common.abc import abstractclass
 
 from laza.common.collections import frozendict
 
-from libs.common.laza.common.collections import fallbackdict
+from laza.common.collections import fallbackdict
 
 
 logger = getLogger(__name__)
@@ -30,7 +39,6 @@ _T_Reason = t.TypeVar('_T_Reason')
 _T_Error = t.TypeVar('_T_Error', bound=Exception)
 
 _T_Pipe = t.Union[Callable[[_T_Val], t.Union[_T_Ret, 'Promise[_T_Ret, _T_Reason]']], 'Promise[_T_Ret, _T_Reason]', _T_Ret]
-_T_StackKey = tuple[t.Union[Callable[[t.Union[_T_Val, _T_Reason]], _T_Ret], None], t.Union['Promise', None]]
 
 _NoneType = type(None)
 
@@ -101,15 +109,12 @@ FULFILLED = State.fulfilled
 REJECTED = State.rejected
 SETTLED = State.settled
 
-
-
-
-print(
-    f'{State.__module__}{State.__name__}',
-    *(f'{s!r}' for s in State), 
-    f'{State.settled=}',
-    sep='\n  - ', end='\n\n'
-)
+# Callback masks are plain ints as `State` set operations are comparatively slow.
+_CANCELLED_MASK = int(CANCELLED)
+_FAILED_MASK = int(FAILED)
+_FULFILLED_MASK = int(FULFILLED)
+_REJECTED_MASK = int(REJECTED)
+_SETTLED_MASK = int(SETTLED)
 
 
 
@@ -138,6 +143,15 @@ class SettledError(Exception, t.Generic[_T_Reason]):
 
 
 
+class AggregateError(Exception):
+    """All promises passed to `Promise.any()` were rejected."""
+
+    def __init__(self, reasons: list=()) -> None:
+        super().__init__(reasons)
+        self.reasons = reasons
+
+
+
 class CancelledError(SettledError[_T_Reason]):
     error_name = 'cancelled'
   
@@ -198,15 +212,386 @@ _default_identities.update({
 #         = NO_STATE
 
 
-class _CallStack(dict[State, dict[_T_StackKey, tuple]]):
+class _Microtasks(local):
+    """A thread-local FIFO queue of promise callbacks. 
+
+    Callbacks scheduled while the queue is being drained are appended instead
+    of being called recursively, so that the stack depth stays constant 
+    regardless of the length of a promise chain.
+    """
+
+    def __init__(self) -> None:
+        self.queue = deque()
+        self.draining = False
+
+    def schedule(self, func: Callable, *args):
+        self.queue.append((func, args))
+        self.draining or self.drain()
+
+    def schedule_many(self, calls: t.Iterable[tuple[Callable, tuple]]):
+        self.queue.extend(calls)
+        self.draining or self.drain()
+
+    def drain(self):
+        queue, error = self.queue, None
+        self.draining = True
+        try:
+            while queue:
+                func, args = queue.popleft()
+                try:
+                    func(*args)
+                except Exception as e:
+                    error = error or e
+        finally:
+            self.draining = False
+        
+        if error is not None:
+            raise error
+
+    @contextmanager
+    def batch(self):
+        if self.draining:
+            yield
+        else:
+            self.draining = True
+            try:
+                yield
+            finally:
+                self.drain()
+
+
+_microtasks = _Microtasks()
+
+
+class _Timer:
+
+    __slots__ = 'expiry', 'callback', 'bucket', 'wheel',
+
+    def __init__(self, wheel: '_TimerWheel', expiry: int, callback: Callable[[], t.Any]) -> None:
+        self.wheel = wheel
+        self.expiry = expiry
+        self.callback = callback
+        self.bucket = None
+
+    def cancel(self) -> bool:
+        """Cancel the timer. Returns False if it already fired or was cancelled."""
+        return self.wheel.cancel(self)
+
+
+
+class _TimerWheel:
+    """A hierarchical timing wheel driven by a single daemon thread.
+
+    Each of the `levels` wheels has `1 << bits` slots and every slot of a wheel
+    spans a full turn of the wheel below it. Scheduling and cancelling a timer
+    is O(1). Timers in the upper wheels cascade down as the clock advances.
+    The thread is started on first use and sleeps while there are no timers.
+    """
+
+    def __init__(self, resolution: float=.01, *, bits: int=6, levels: int=4) -> None:
+        self.resolution = resolution
+        self.bits = bits
+        self.mask = (1 << bits) - 1
+        self.span = 1 << bits * levels
+        self.wheels = [[{} for _ in range(1 << bits)] for _ in range(levels)]
+        self.lock = Lock()
+        self.cond = Condition(self.lock)
+        self.tick = 0
+        self.count = 0
+        self.origin = monotonic()
+        self.thread: Thread = None
+
+    def schedule(self, delay: float, callback: Callable[[], t.Any]) -> _Timer:
+        """Call `callback` in the timer thread after `delay` seconds."""
+        with self.lock:
+            now = self._now()
+            if not self.count:
+                self.tick = now
+            # one extra tick as `now` is rounded down, so that timers never fire early.
+            timer = _Timer(self, now + max(1, ceil(delay / self.resolution)) + 1, callback)
+            self._place(timer)
+            self.count += 1
+            if self.thread is None:
+                self.thread = Thread(target=self._run, name=f'{self.__class__.__name__}', daemon=True)
+                self.thread.start()
+            elif self.count == 1:
+                self.cond.notify()
+        return timer
+
+    def cancel(self, timer: _Timer) -> bool:
+        with self.lock:
+            if (bucket := timer.bucket) is not None:
+                del bucket[timer]
+                timer.bucket = None
+                self.count -= 1
+                return True
+        return False
+
+    def _place(self, timer: _Timer):
+        expiry, bits = timer.expiry, self.bits
+        if (delta := expiry - self.tick) >= self.span:
+            expiry, delta = self.tick + self.span - 1, self.span - 1
+        
+        level = 0
+        while delta >> bits * (level + 1):
+            level += 1
+
+        timer.bucket = bucket = self.wheels[level][expiry >> bits * level & self.mask]
+        bucket[timer] = None
+
+    def _now(self) -> int:
+        return int((monotonic() - self.origin) / self.resolution)
+
+    def _advance(self) -> list[_Timer]:
+        self.tick = tick = self.tick + 1
+        bits, mask, wheels = self.bits, self.mask, self.wheels
+        
+        top = 0
+        while top + 1 < len(wheels) and not tick >> bits * top & mask:
+            top += 1
+
+        # cascade from the top so that timers moving down more than one level 
+        # land in slots that are yet to be cascaded.
+        for level in range(top, 0, -1):
+            bucket = wheels[level][tick >> bits * level & mask]
+            timers = [*bucket]
+            bucket.clear()
+            for timer in timers:
+                self._place(timer)
+
+        bucket = self.wheels[0][tick & mask]
+        timers = [*bucket]
+        bucket.clear()
+        for timer in timers:
+            timer.bucket = None
+        self.count -= len(timers)
+        return timers
+
+    def _run(self):
+        cond, resolution = self.cond, self.resolution
+        while True:
+            with cond:
+                while not self.count:
+                    cond.wait()
+                
+                if (now := self._now()) <= self.tick:
+                    cond.wait((self.tick + 1 - now) * resolution)
+                    continue
+
+                expired = []
+                while self.tick < now and self.count:
+                    expired += self._advance()
+                self.tick = max(self.tick, now)
+
+            for timer in expired:
+                try:
+                    timer.callback()
+                except Exception:
+                    logger.exception(f'error in timer callback {timer.callback!r}')
+
+
+
+_timers = _TimerWheel()
+
+
+@cache
+def _timeout_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(thread_name_prefix='PromiseTimeout')
+
+
+def _submit_or_call(executor: Executor, fn: Callable, *args):
+    try:
+        executor.submit(fn, *args)
+    except RuntimeError:
+        # the executor is shut down (e.g. at exit). Settle inline.
+        fn(*args)
+
+
+
+# Promises are guarded by a pool of striped locks instead of a lock each.
+# A lock is only held while checking or changing the state of a single 
+# promise and never while running callbacks.
+_LOCK_MASK = 63
+_locks = tuple(Lock() for _ in range(_LOCK_MASK + 1))
+
+
+
+def _cancel_future(fut: t.Union[asyncio.Future, ConcurrentFuture]):
+    if isinstance(fut, asyncio.Future) and (loop := fut.get_loop()) is not asyncio._get_running_loop():
+        loop.is_closed() or loop.call_soon_threadsafe(fut.cancel)
+    else:
+        fut.cancel()
+
+
+
+# A registered callback: (state mask, dedup key, callback, args, destination)
+_T_Callback = tuple[int, t.Any, t.Union[Callable, None], t.Union[bool, tuple], t.Union['Promise', None]]
+
+
+def _callback(cb: t.Union[_T_FuncTypes, 'Promise'], mask: int, args: t.Union[bool, tuple]=True) -> _T_Callback:
+    if isinstance(cb, Promise):
+        return mask, cb, None, (), cb
+    return mask, cb, cb, args, None
+
+
+
+class PromiseTraceInfo(t.NamedTuple):
+    created: int
+    pending: int
+    settled: int
+    rejected: int
+    unhandled: int
+    latency: ProfileInfo
+
+
+
+class PromiseTrace:
+    """Trace record of a single promise while tracing is enabled. 
     
-    __slots__ = ()
+    It is owned by the promise and freed with it, which is when unhandled 
+    rejections are detected.
+    """
+
+    __slots__ = 'tracer', 'created', 'latency', 'state', 'reason', 'handled', 'stack', 'parent', '__weakref__',
+
+    def __init__(self, tracer: 'PromiseTracer', stack: traceback.StackSummary=None) -> None:
+        self.tracer = tracer
+        self.created = perf_counter_ns()
+        self.latency = None
+        self.state = PENDING
+        self.reason = None
+        self.handled = False
+        self.stack = stack
+        self.parent: PromiseTrace = None
+
+    def chain(self) -> t.Iterator['PromiseTrace']:
+        """Iterate over this record and those of the promises it derives from."""
+        rec = self
+        while rec is not None:
+            yield rec
+            rec = rec.parent
+
+    def format(self) -> str:
+        lines = []
+        for i, rec in enumerate(self.chain()):
+            lines.append(f'{"derived from " if i else ""}promise created at:')
+            if rec.stack is None:
+                lines.append('  <creation site not sampled>\n')
+            else:
+                lines.extend(rec.stack.format())
+        return ''.join(f'{ln}\n' if not ln.endswith('\n') else ln for ln in lines)
+
+    def _settled(self, state: State, result):
+        self.latency = perf_counter_ns() - self.created
+        self.state = state
+        if state is not FULFILLED:
+            self.reason = result
+        self.tracer._settled(self)
+
+    def _handle(self):
+        self.handled = True
 
-    def __missing__(self, key):
-        return self.setdefault(key, {})
+    def __del__(self):
+        if not self.handled and self.state is not PENDING and self.state is not FULFILLED:
+            self.tracer._unhandled(self)
 
 
 
+class PromiseTracer:
+    """Opt-in instrumentation for promises. Enable it with `enable_tracing()`.
+
+    Tracks the number of created, pending, settled and rejected promises and 
+    a histogram of the time from creation to settlement. The creation site
+    stack of every `1/sample`th promise is captured, up to `depth` frames.
+
+    A promise that is rejected without a rejection handler (or being awaited)
+    by the time it is garbage collected, or the interpreter exits, is reported
+    to `on_unhandled(trace)`, which defaults to logging an error.
+    """
+
+    def __init__(self, *, sample: float=.01, depth: int=8, on_unhandled: Callable[[PromiseTrace], t.Any]=None) -> None:
+        # reentrant since `PromiseTrace.__del__` may be run by the gc while 
+        # the lock is held by the same thread.
+        self.lock = RLock()
+        self.depth = depth
+        self.on_unhandled = on_unhandled or self._log_unhandled
+        self.latency = ProfileStats('promise.settle', 1)
+        self.stride = max(1, round(1 / sample)) if sample else 0
+        self.created = self.settled = self.rejected = self.unhandled = 0
+        self._rejected: WeakSet[PromiseTrace] = WeakSet()
+        self._seq = count()
+
+    def _trace(self) -> PromiseTrace:
+        stack = None
+        if self.stride and not next(self._seq) % self.stride:
+            stack = traceback.StackSummary.extract(traceback.walk_stack(sys._getframe(3)), limit=self.depth)
+            stack.reverse()
+        with self.lock:
+            self.created += 1
+        return PromiseTrace(self, stack)
+
+    def _settled(self, trace: PromiseTrace):
+        with self.lock:
+            self.settled += 1
+            if trace.state is not FULFILLED:
+                self.rejected += 1
+                trace.handled or self._rejected.add(trace)
+        self.latency.record(trace.latency)
+
+    def _unhandled(self, trace: PromiseTrace):
+        with self.lock:
+            self.unhandled += 1
+            self._rejected.discard(trace)
+        trace.handled = True
+        self.on_unhandled(trace)
+
+    def _log_unhandled(self, trace: PromiseTrace):
+        logger.error(
+            f'unhandled {trace.state.name} promise: reason={trace.reason!r}\n{trace.format()}'
+        )
+
+    def check(self):
+        """Report all live promises that are rejected and still unhandled."""
+        with self.lock:
+            traces = [t for t in self._rejected if not t.handled]
+        for trace in traces:
+            self._unhandled(trace)
+
+    def info(self) -> PromiseTraceInfo:
+        with self.lock:
+            return PromiseTraceInfo(
+                self.created, self.created - self.settled, self.settled,
+                self.rejected, self.unhandled, self.latency.info(),
+            )
+
+
+
+_tracer: t.Union[PromiseTracer, None] = None
+
+
+def enable_tracing(tracer: PromiseTracer=None, **kwds) -> PromiseTracer:
+    """Start tracing promises created from now on with the given tracer or a 
+    new `PromiseTracer(**kwds)`. Returns the active tracer.
+    """
+    global _tracer
+    if tracer is None:
+        tracer = PromiseTracer(**kwds)
+    _tracer = tracer
+    return tracer
+
+
+def disable_tracing() -> t.Union[PromiseTracer, None]:
+    """Stop tracing new promises. Returns the tracer that was active."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+@atexit.register
+def _check_unhandled():
+    _tracer is None or _tracer.check()
+
+
 
 class BasePromise(t.Generic[_T_Val, _T_Reason, _T_Error], metaclass=ABCMeta):
 
@@ -282,10 +667,7 @@ class BasePromise(t.Generic[_T_Val, _T_Reason, _T_Error], metaclass=ABCMeta):
 
 class Promise(BasePromise[_T_Val, _T_Reason, _T_Error]):
 
-    __slots__ = (
-        '__state', '__result', '__stack', # '__lock', 
-        
-    )
+    __slots__ = '__state', '__result', '__callbacks', '__trace',
 
     if t.TYPE_CHECKING:
         class State(State): ...
@@ -293,8 +675,8 @@ class Promise(BasePromise[_T_Val, _T_Reason, _T_Error]):
     __state: State
     __result: t.Union[_T_Val, CancelledError[_T_Reason], Exception]
 
-
-    __stack: _CallStack
+    __callbacks: t.Union[_T_Callback, list[_T_Callback], None]
+    __trace: t.Union[PromiseTrace, None]
 
     State: t.Final = State
 
@@ -304,27 +686,36 @@ class Promise(BasePromise[_T_Val, _T_Reason, _T_Error]):
     @classmethod
     def __make(cls, state: State=PENDING, result: t.Union[_T_Val, _T_Reason]=None, *, source: 'Promise'=None):
         self = object.__new__(cls)
+        self.__trace = trace = None if _tracer is None else _tracer._trace()
         if source is None:
             if state is PENDING:
                 self.__state = PENDING
-                # self.__lock = Lock()
-                self.__stack = _CallStack()
+                self.__callbacks = None
             elif state in SETTLED:
                 self.__state = state
                 self.__result = result
+                trace is None or trace._settled(state, result)
             else:
                 raise InvalidStateError(f'invalid push state: {state!r} allowed: {SETTLED!r}')
-        elif not source.__state is PENDING:
-            self.__state = source.__state
-            self.__result = source.__result
         else:
-            self.__state = PENDING
-            # self.__lock = _NoopLock()
-            self.__stack = _CallStack()
-            source.then(self)
+            if trace is not None:
+                trace.parent = source.__trace
+            if not source.__state is PENDING:
+                self.__state = source.__state
+                self.__result = source.__result
+                trace is None or trace._settled(self.__state, self.__result)
+            else:
+                self.__state = PENDING
+                self.__callbacks = None
+                source.then(self)
 
         return self
 
+    @property
+    def __trace__(self) -> t.Union[PromiseTrace, None]:
+        """The trace record of the promise if it was created while tracing."""
+        return self.__trace
+
     @classmethod
     def cast(cls: type[Self], value: t.Union[_T_Val, 'Promise']) -> Self:
         if isinstance(value, cls):
@@ -332,6 +723,187 @@ class Promise(BasePromise[_T_Val, _T_Reason, _T_Error]):
         else:
             return cls.__make(FULFILLED, value)
    
+    @classmethod
+    def from_future(cls: type[Self], fut: t.Union[asyncio.Future, ConcurrentFuture]) -> Self:
+        """Create a promise that is settled when the given `asyncio` or 
+        `concurrent.futures` future is done. Cancelling the promise cancels
+        the future.
+        """
+        self = cls.__make()
+        self.__add((_CANCELLED_MASK, None, partial(_cancel_future, fut), (), None))
+        fut.add_done_callback(self.__settle_from_future)
+        return self
+
+    @classmethod
+    def run_in(cls: type[Self], executor: t.Union[Executor, 'PromiseExecutor'], fn: Callable[..., _T_Val], /, *args, **kwds) -> Self:
+        """Run `fn(*args, **kwds)` in the given `concurrent.futures` executor 
+        and return a promise of its result. 
+        
+        The promise is settled from the future's completion callback, no 
+        extra thread waits on it. Cancelling the promise cancels the future.
+        """
+        if isinstance(executor, PromiseExecutor):
+            return executor.submit(fn, *args, **kwds)
+        return cls.from_future(executor.submit(fn, *args, **kwds))
+
+    @classmethod
+    def from_coroutine(cls: type[Self], coro: t.Coroutine[t.Any, t.Any, _T_Val], loop: asyncio.AbstractEventLoop=None) -> Self:
+        """Schedule `coro` as a task on `loop` (defaults to the running loop) and
+        return a promise of its result. `loop` may be running in another thread.
+        """
+        if loop is None:
+            fut = asyncio.get_running_loop().create_task(coro)
+        elif loop is asyncio._get_running_loop():
+            fut = loop.create_task(coro)
+        else:
+            fut = asyncio.run_coroutine_threadsafe(coro, loop)
+        return cls.from_future(fut)
+
+    def __settle_from_future(self, fut: t.Union[asyncio.Future, ConcurrentFuture]):
+        if fut.cancelled():
+            self.__settle(None, CANCELLED)
+        elif (err := fut.exception()) is not None:
+            self.__settle(err, FAILED)
+        else:
+            self.__settle(fut.result(), FULFILLED)
+
+    def to_future(self, loop: asyncio.AbstractEventLoop=None) -> asyncio.Future:
+        """Return an `asyncio.Future` on `loop` (defaults to the running loop)
+        that is settled with this promise.
+
+        If the promise is settled from another thread, the future is updated via
+        `loop.call_soon_threadsafe`.
+        """
+        if loop is None:
+            loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self.finaly(partial(self.__copy_to_future, fut, loop))
+        return fut
+
+    def __copy_to_future(self, fut: asyncio.Future, loop: asyncio.AbstractEventLoop):
+        if asyncio._get_running_loop() is loop:
+            self.__set_future(fut)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self.__set_future, fut)
+
+    def __set_future(self, fut: asyncio.Future):
+        if not fut.done():
+            try:
+                fut.set_result(self.result())
+            except SettledError as e:
+                fut.set_exception(e)
+
+    def __await__(self):
+        if self.__state is PENDING:
+            return (yield from self.to_future().__await__())
+        self.__handled()
+        return self.result()
+
+    @staticmethod
+    def batch():
+        """Return a context manager that defers running callbacks of promises
+        settled within it until it exits, so that they are drained in one pass::
+
+                with Promise.batch():
+                    for p, v in zip(promises, values):
+                        p.fulfil(v)
+        """
+        return _microtasks.batch()
+
+    @class_only_method
+    def all(cls, promises: t.Iterable[t.Union['Promise[_T_Val]', _T_Val]]) -> 'Promise[list[_T_Val]]':
+        """Return a promise fulfilled with the list of results once all 
+        `promises` are fulfilled, or rejected as soon as any of them is rejected.
+        Non-promise items are treated as fulfilled values.
+        """
+        items = list(promises)
+        results = [None] * len(items)
+        done, total = count(1), len(items) + 1
+        target = cls.__make()
+
+        def settled(i, p: Promise):
+            if target.__state is PENDING:
+                if p.__state is FULFILLED:
+                    results[i] = p.__result
+                    next(done) == total and target.__settle(results, FULFILLED)
+                else:
+                    target.__settle(p.__result, p.__state)
+
+        for i, p in enumerate(items):
+            if isinstance(p, Promise):
+                p.finaly(partial(settled, i, p))
+            else:
+                results[i] = p
+                next(done)
+        
+        next(done) == total and target.__settle(results, FULFILLED)
+        return target
+
+    @class_only_method
+    def all_settled(cls, promises: t.Iterable[t.Union['Promise[_T_Val]', _T_Val]]) -> 'Promise[list[Promise[_T_Val]]]':
+        """Return a promise fulfilled with the list of settled promises once all
+        `promises` are settled. Non-promise items are cast to fulfilled promises.
+        """
+        results = [p if isinstance(p, Promise) else cls.__make(FULFILLED, p) for p in promises]
+        done, total = count(1), len(results) + 1
+        target = cls.__make()
+
+        def settled():
+            next(done) == total and target.__settle(results, FULFILLED)
+
+        for p in results:
+            p.finaly(settled)
+
+        next(done) == total and target.__settle(results, FULFILLED)
+        return target
+
+    @class_only_method
+    def any(cls, promises: t.Iterable[t.Union['Promise[_T_Val]', _T_Val]]) -> 'Promise[_T_Val]':
+        """Return a promise fulfilled with the result of the first fulfilled
+        promise in `promises`. If all of them are rejected, it fails with an 
+        `AggregateError` of their reasons.
+        """
+        items = list(promises)
+        reasons = [None] * len(items)
+        done, total = count(1), len(items) + 1
+        target = cls.__make()
+
+        def settled(i, p: Promise):
+            if target.__state is PENDING:
+                if p.__state is FULFILLED:
+                    target.__settle(p.__result, FULFILLED)
+                else:
+                    reasons[i] = p.__result
+                    next(done) == total and target.__settle(AggregateError(reasons), FAILED)
+
+        for i, p in enumerate(items):
+            if isinstance(p, Promise):
+                p.finaly(partial(settled, i, p))
+            else:
+                target.__settle(p, FULFILLED)
+                break
+        else:
+            next(done) == total and target.__settle(AggregateError(reasons), FAILED)
+        return target
+
+    @class_only_method
+    def race(cls, promises: t.Iterable[t.Union['Promise[_T_Val]', _T_Val]]) -> 'Promise[_T_Val]':
+        """Return a promise settled like the first settled promise in `promises`."""
+        target = cls.__make()
+
+        def settled(p: Promise):
+            target.__settle(p.__result, p.__state)
+
+        for p in promises:
+            if not isinstance(p, Promise):
+                target.__settle(p, FULFILLED)
+                break
+            p.finaly(partial(settled, p))
+            if target.__state is not PENDING:
+                break
+
+        return target
+
     @class_only_method
     def cancelled(cls, reason: _T_Reason=None):
         return cls.__make(CANCELLED, reason)
@@ -395,9 +967,10 @@ class Promise(BasePromise[_T_Val, _T_Reason, _T_Error]):
             fulcls = fulfil.__class__
 
             if fulcls is Promise:
-                self.__push_callbacks((fulfil, SETTLED))
+                self.__handled()
+                self.__add(_callback(fulfil, _SETTLED_MASK))
             elif fulcls in _FuncTypeSet:
-                self.__push_callbacks((fulfil, FULFILLED))
+                self.__add(_callback(fulfil, _FULFILLED_MASK))
             elif fulfil is _empty:
                 raise TypeError(
                     f'`{self.__class__.__name__}.then()` '
@@ -410,12 +983,19 @@ class Promise(BasePromise[_T_Val, _T_Reason, _T_Error]):
                     f'or `Promise`. Got: `{fulfil.__class__.__name__}`'
                 )
         elif reject is _empty:
-            fulfil is _empty or self.__push_callbacks((fulfil, FULFILLED))
-            cancel is _empty or self.__push_callbacks((cancel, CANCELLED))
-            fail   is _empty or self.__push_callbacks((fail, FAILED))
+            self.__handled()
+            self.__add(*(
+                _callback(cb, mask) for cb, mask in (
+                    (fulfil, _FULFILLED_MASK), (cancel, _CANCELLED_MASK), (fail, _FAILED_MASK)
+                ) if cb is not _empty
+            ))
         elif cancel is _empty is fail:
-            fulfil is _empty or self.__push_callbacks((fulfil, FULFILLED))
-            reject is _empty or self.__push_callbacks((reject, REJECTED))
+            self.__handled()
+            self.__add(*(
+                _callback(cb, mask) for cb, mask in (
+                    (fulfil, _FULFILLED_MASK), (reject, _REJECTED_MASK)
+                ) if cb is not _empty
+            ))
         else:
             raise ValueError(
                 f'argument `reject` is mutually exclusive to `cancel` and `fail`'
@@ -424,78 +1004,75 @@ class Promise(BasePromise[_T_Val, _T_Reason, _T_Error]):
         return self
 
     def finaly(self, callback: _T_FuncTypes):
-        self.__push_callbacks((callback, SETTLED, ()))
+        self.__handled()
+        self.__add(_callback(callback, _SETTLED_MASK, ()))
         return self
 
-    def __push(self, *funcs: t.Union[tuple[_T_Bind, State], _T_Bind], state: State=NO_STATE, args=True):
-        fill = _noop_arg, state, args
-        state = self.__state
+    def __handled(self):
+        # only registrations made through the public api count as handling 
+        # a rejection. Internal bookkeeping callbacks (e.g. timers) don't.
+        if self.__trace is not None:
+            self.__trace._handle()
 
-        items = (a + fill[len(a):] if isinstance(a, tuple) else (a, *fill[1:]) for a in funcs)
-        
+    def __push(self, *funcs: tuple[_T_Pipe, State]):
+        # rejections not handled by `funcs` are propagated to, and tracked by, 
+        # the derived promise.
+        self.__handled()
         target = self.__make()
-
-        if state is PENDING:
-            settled = NO_STATE
-
-            stack = self.__stack
-            for cb, ss, v in items:
-                fn = _project(cb)
-                settled = settled | ss
-                for s in ss:
-                    stack[s][target, cb] = fn, v, target
-
-            # _val = lambda: target.__state is PENDING and target.__settle(self), (self,), None
-            _val = None, (), target
-            for s in ~settled:
-                stack[s].setdefault(target, _val)
-
-            self.__flush()
-        else:
-            settled = False
-            res = () if self.__result is None else (self.__result,)
-            for cb, ss, a in items:
-                if state in ss:
-                    self.__run(_project(cb), res if a is True else a, target)
-                    settled = True
-
-            settled or target.__settle(self)
-
+        if target.__trace is not None:
+            target.__trace.parent = self.__trace
+        handled = 0
+        callbacks = []
+        for cb, ss in funcs:
+            handled |= (mask := int(ss))
+            callbacks.append((mask, None, _project(cb), True, target))
+
+        if mask := _SETTLED_MASK & ~handled:
+            callbacks.append((mask, None, None, (), target))
+
+        self.__add(*callbacks)
         return target
 
-    def __push_callbacks(self, *funcs: t.Union[tuple[_T_FuncTypes, State, t.Union[bool, tuple]], _T_FuncTypes], state: State=None, args=True):
-        fill = state, args
-        state = self.__state
-
-        items = (o + fill[len(o)-1:] if isinstance(o, tuple) else (o, *fill) for o in funcs)
-        
-        if state is PENDING:
-            stack = self.__stack
-            for cb, ss, a in items:
-                if isinstance(k := cb, Promise): 
-                    # v = lambda: k.__state is PENDING and k.settle(self), (), None
-                    v = None, (), k
-                else:
-                    v = k, a, None
-                v = k, a, None
-                for s in ss:
-                    stack[s].setdefault(k, v)
-
-            self.__flush()
-        else:
-            res = () if self.__result is None else (self.__result,)
-            for cb, ss, a in items:
-                if state in ss:
-                    out = None
-                    if isinstance(k := cb, Promise): # and a is args: 
-                        out, cb = cb, None
-                        # args =  lambda: k.__state is PENDING and k.settle(self), (),
-                    self.__run(cb, res if a is True else a, out)
+    def __add(self, *callbacks: _T_Callback):
+        with self.__lock:
+            if self.__state is PENDING:
+                current = self.__callbacks
+                if current is None and len(callbacks) == 1:
+                    self.__callbacks = callbacks[0]
+                    return
+                
+                items = [] if current is None else current if current.__class__ is list else [current]
+                for cb in callbacks:
+                    if (key := cb[1]) is not None:
+                        mask = cb[0]
+                        for o in items:
+                            if o[1] is key:
+                                mask &= ~o[0]
+                        if not mask:
+                            continue
+                        elif mask != cb[0]:
+                            cb = (mask, *cb[1:])
+                    items.append(cb)
+                
+                self.__callbacks = items[0] if len(items) == 1 else items or None
+                return
+
+        result = self.__result
+        self.__flush(callbacks, self.__state, () if result is None else (result,))
 
     def _unbind(self, callback: _T_FuncTypes, state: State=SETTLED):
-        n = 0
-        for k in state:
-            n += not self.__stack[k].pop(callback, ...) is ...
+        n, bits = 0, int(state)
+        with self.__lock:
+            if self.__state is PENDING and (current := self.__callbacks) is not None:
+                items = []
+                for cb in (current if current.__class__ is list else (current,)):
+                    if cb[1] is callback and cb[0] & bits:
+                        n += 1
+                        if not (mask := cb[0] & ~bits):
+                            continue
+                        cb = (mask, *cb[1:])
+                    items.append(cb)
+                self.__callbacks = items[0] if len(items) == 1 else items or None
         return n
 
     def fulfil(self, result: _T_Val=None) -> Self:
@@ -504,9 +1081,31 @@ class Promise(BasePromise[_T_Val, _T_Reason, _T_Error]):
         return self
     
     def cancel(self, reason: _T_Reason=None) -> Self:
+        """Cancel the promise. Derived promises without a `cancel` handler are
+        cancelled with it.
+        """
         if not self.__settle(reason, CANCELLED):
             raise InvalidStateError(f'Promise already settled: {self}')
         return self
+
+    def timeout(self, seconds: float, reason: _T_Reason=None, *, executor: t.Union[Executor, 'PromiseExecutor']=None) -> Self:
+        """Cancel the promise if it is still pending after `seconds`.
+
+        `reason` defaults to a `TimeoutError`. Timeouts share a single timer 
+        wheel thread and the timer is discarded once the promise settles. The 
+        cancellation and its callbacks run in `executor` (a shared thread pool
+        by default) so that slow callbacks don't hold up other timers.
+        """
+        if self.__state is PENDING:
+            if reason is None:
+                reason = TimeoutError(f'timed out after {seconds}s')
+            if executor is None:
+                executor = _timeout_executor()
+            elif isinstance(executor, PromiseExecutor):
+                executor = executor.executor
+            timer = _timers.schedule(seconds, partial(_submit_or_call, executor, self.__settle, reason, CANCELLED))
+            self.__add((_SETTLED_MASK, None, timer.cancel, (), None))
+        return self
     
     def fail(self, error: _T_Error=None) -> Self:
         if not self.__settle(error, FAILED):
@@ -534,33 +1133,40 @@ class Promise(BasePromise[_T_Val, _T_Reason, _T_Error]):
     @t.overload
     def __settle(self, result: _T_Error, state: FAILED) -> bool: ...
     def __settle(self, result: t.Union[Self, _T_Val, _T_Reason, _T_Error, None]=None, state: State=None) -> bool:
-        if self.__state is PENDING:
-            # with self.__lock:
-            if state is None and result.__class__ is Promise:
-                if result.__state is PENDING: 
-                    result.then(self)
-                else:
-                    self.__result = result.__result
-                    self.__state =  result.__state 
-            elif state in SETTLED:
-                self.__state = state
-                self.__result = result
-            else:
-                raise InvalidStateError(f'invalid push state: {state!r} allowed: {SETTLED!r}')
-            self.__flush()
-            return True
-        return False
-
-    def __flush(self):
-        state = self.__state
-        if not state is PENDING:
-            stack = self.__stack
-            args = () if self.__result is None else (self.__result,)
-            while stack:
-                s, dct = stack.popitem()
-                if s is state:
-                    for cb, v, out in dct.values():
-                        self.__run(cb, args if v is True else v, out)
+        if state is None and isinstance(result, Promise):
+            if (state := result.__state) is PENDING:
+                if self.__state is not PENDING:
+                    return False
+                result.then(self)
+                return True
+            result = result.__result
+        elif state not in SETTLED:
+            raise InvalidStateError(f'invalid push state: {state!r} allowed: {SETTLED!r}')
+
+        with self.__lock:
+            if self.__state is not PENDING:
+                return False
+            self.__result = result
+            self.__state = state
+            callbacks, self.__callbacks = self.__callbacks, None
+
+        if self.__trace is not None:
+            self.__trace._settled(state, result)
+
+        if callbacks is not None:
+            self.__flush(callbacks if callbacks.__class__ is list else (callbacks,), state, () if result is None else (result,))
+        return True
+
+    def __flush(self, callbacks: t.Sequence[_T_Callback], state: State, args: tuple):
+        bit, run = int(state), self.__run
+        if len(callbacks) == 1:
+            mask, _, cb, a, dest = callbacks[0]
+            mask & bit and _microtasks.schedule(run, cb, args if a is True else a, dest)
+        else:
+            _microtasks.schedule_many([
+                (run, (cb, args if a is True else a, dest)) 
+                for mask, _, cb, a, dest in callbacks if mask & bit
+            ])
     
     def __run(self, cb: t.Union[_T_FuncTypes, None], args: t.Union[bool, tuple]=True, dest:Self=None):
         if cb is None:
@@ -572,12 +1178,16 @@ class Promise(BasePromise[_T_Val, _T_Reason, _T_Error]):
                 if dest is None:
                     raise e
                 elif isinstance(e, CancelledError):
-                    dest.cancel(e)
+                    dest.__settle(e, CANCELLED)
                 else:
-                    dest.fail(e)
+                    dest.__settle(e, FAILED)
             else:
                 dest is None \
-                    or (r.then(dest) if isinstance(r, Promise) else dest.fulfil(r))
+                    or (r.then(dest) if isinstance(r, Promise) else dest.__settle(r, FULFILLED))
+
+    @property
+    def __lock(self) -> Lock:
+        return _locks[id(self) >> 4 & _LOCK_MASK]
 
     def __eq__(self, o) -> bool:
         return o is self
@@ -588,3 +1198,55 @@ class Promise(BasePromise[_T_Val, _T_Reason, _T_Error]):
 
 
 
+class PromiseExecutor:
+    """Wraps a `concurrent.futures` executor so that submitted calls return 
+    promises::
+
+            with PromiseExecutor(max_workers=4, max_pending=100) as ex:
+                results = ex.map(parse, files)
+
+    If no `executor` is given, a `ThreadPoolExecutor` (or `ProcessPoolExecutor`
+    if `processes` is True) is created and owned by the wrapper.
+
+    With `max_pending`, at most that many calls are queued or running at a time
+    and `submit()` blocks until a slot is free, applying backpressure to 
+    producers.
+    """
+
+    __slots__ = 'executor', 'owned', '_slots', '__weakref__',
+
+    def __init__(self, executor: Executor=None, *, max_workers: int=None, processes: bool=False, max_pending: int=None):
+        if owned := executor is None:
+            executor = (ProcessPoolExecutor if processes else ThreadPoolExecutor)(max_workers)
+        self.executor = executor
+        self.owned = owned
+        self._slots = None if max_pending is None else BoundedSemaphore(max_pending)
+
+    def submit(self, fn: Callable[..., _T_Val], /, *args, **kwds) -> 'Promise[_T_Val]':
+        """Schedule `fn(*args, **kwds)` and return a promise of its result."""
+        if (slots := self._slots) is None:
+            return Promise.from_future(self.executor.submit(fn, *args, **kwds))
+        
+        slots.acquire()
+        try:
+            fut = self.executor.submit(fn, *args, **kwds)
+        except BaseException:
+            slots.release()
+            raise
+        fut.add_done_callback(lambda f: slots.release())
+        return Promise.from_future(fut)
+
+    def map(self, fn: Callable[..., _T_Val], *iterables: t.Iterable) -> 'Promise[list[_T_Val]]':
+        """Submit `fn` for each set of arguments and return a promise of all 
+        the results, see `Promise.all()`.
+        """
+        return Promise.all([self.submit(fn, *args) for args in zip(*iterables)])
+
+    def shutdown(self, wait: bool=True, *, cancel_futures: bool=False):
+        self.executor.shutdown(wait, cancel_futures=cancel_futures)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc):
+        self.owned and self.shutdown()
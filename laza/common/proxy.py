@@ -1,16 +1,26 @@
 from __future__ import annotations
+import asyncio
 import copy
 import math
 import operator
 import typing as t
+from contextvars import ContextVar, Token
 from functools import cache, partial
+from logging import getLogger
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import monotonic
+from weakref import WeakKeyDictionary, ref as weakref
 
 
 
 _TP = t.TypeVar('_TP', covariant=True)
 _T_Fget = t.Callable[[], _TP]
+_T_AsyncFget = t.Callable[[], t.Awaitable[_TP]]
 
 
+logger = getLogger(__name__)
+
 _notset = object()
 
 
@@ -136,6 +146,14 @@ _proxy_attrs = frozenset((
     '__proxy_func__',  
     '__proxy_target_val__', 
     '__proxy_target__',
+    '__proxy_invalidate__',
+    '__proxy_var__',
+    '__proxy_set__',
+    '__proxy_reset__',
+    '__proxy_ready__',
+    '__proxy_task__',
+    '__proxy_factory__',
+    '__reduce_ex__',
     # '__call__',
     # '__iadd__',
     # '__isub__',
@@ -172,6 +190,12 @@ class Proxy(t.Generic[_TP], metaclass=ProxyType):
     )
 
     __proxy_func__: _T_Fget[_TP]
+
+    __proxy_capture__: t.ClassVar[t.Literal['target', 'factory']] = 'target'
+    """What `copy`, `deepcopy` and `pickle` capture. With `'target'`, they 
+    produce (a copy of) the resolved target itself. With `'factory'`, they 
+    produce a new proxy of the same class from `__proxy_factory__()`.
+    """
     
 
     @t.overload
@@ -217,6 +241,16 @@ class Proxy(t.Generic[_TP], metaclass=ProxyType):
     def __proxy_class__(cls):
         return cls
 
+    @classmethod
+    def __proxy_resolver__(cls) -> t.Callable[[Proxy[_TP]], _TP]:
+        """Return a function `(proxy) -> target` equivalent to reading 
+        `__proxy_target__`. Used by the classes generated by `proxy_class_for()`.
+        """
+        if cls.__proxy_target__ is Proxy.__dict__['__proxy_target__']:
+            func = Proxy.__dict__['__proxy_func__'].__get__
+            return lambda self: func(self)()
+        return lambda self: _object_getattribute(self, '__proxy_target__')
+
     @property
     def __proxy_target__(self) -> _TP:
         """Return the current object.  This is useful if you want the real
@@ -225,6 +259,29 @@ class Proxy(t.Generic[_TP], metaclass=ProxyType):
         """
         return self.__proxy_func__()
 
+    def __proxy_factory__(self) -> tuple[tuple, dict[str, t.Any]]:
+        """Return the `(args, kwargs)` that recreate this proxy in `'factory'`
+        capture mode.
+        """
+        return (_object_getattribute(self, '__proxy_func__'),), {}
+
+    def __copy__(self):
+        if type(self).__proxy_capture__ == 'factory':
+            func, args = _proxy_reduce(self)
+            return func(*args)
+        return copy.copy(_object_getattribute(self, '__proxy_target__'))
+
+    def __deepcopy__(self, memo):
+        if type(self).__proxy_capture__ == 'factory':
+            func, args = _proxy_reduce(self)
+            return func(*copy.deepcopy(args, memo))
+        return copy.deepcopy(_object_getattribute(self, '__proxy_target__'), memo)
+
+    def __reduce_ex__(self, protocol):
+        if type(self).__proxy_capture__ == 'factory':
+            return _proxy_reduce(self)
+        return _unproxied, (_object_getattribute(self, '__proxy_target__'),)
+
 #
     __doc__ = _ProxyLookup(  # type: ignore
         class_value=__doc__, fallback=lambda self: type(self).__doc__
@@ -344,17 +401,34 @@ class Proxy(t.Generic[_TP], metaclass=ProxyType):
     __anext__ = _ProxyLookup()
     __aenter__ = _ProxyLookup()
     __aexit__ = _ProxyLookup()
-    __copy__ = _ProxyLookup(copy.copy)
-    __deepcopy__ = _ProxyLookup(copy.deepcopy)
+    # __copy__, __deepcopy__ and __reduce_ex__ depend on `__proxy_capture__`
     # __getnewargs_ex__ (pickle through proxy not supported)
     # __getnewargs__ (pickle)
     # __getstate__ (pickle)
     # __setstate__ (pickle)
     # __reduce__ (pickle)
-    # __reduce_ex__ (pickle)
 ###
 
 
+
+def _unproxied(obj):
+    return obj
+
+
+def _proxy_reduce(self: Proxy):
+    cls = type(self)
+    args, kwds = _object_getattribute(self, '__proxy_factory__')()
+    if (typ := cls.__dict__.get('__proxy_type__')) is not None:
+        return _make_generated_proxy, (typ(), cls.__bases__[0], args, kwds)
+    elif kwds:
+        return partial(cls, **kwds), args
+    return cls, args
+
+
+def _make_generated_proxy(typ, base, args, kwds):
+    return proxy_class_for(typ, base)(*args, **kwds)
+
+
 class SimpleProxy(Proxy[_TP]):
 
     __slots__ = ()
@@ -365,14 +439,45 @@ class SimpleProxy(Proxy[_TP]):
 
 
 class CachedProxy(Proxy[_TP]):
+    """A proxy that resolves its target once and caches it.
+
+    Resolution is thread-safe: concurrent first access calls `fget` exactly 
+    once while the other callers wait for its result.
+
+    With `ttl` (seconds), the target is resolved again after it expires. By
+    default, the first caller after expiry reloads it while the rest wait. 
+    With `refresh`, the target is instead reloaded in a background thread 
+    while the stale value keeps being served, so readers never block on 
+    expiry. `refresh` may be `True` (refresh on expiry) or a fraction of `ttl`
+    after which to refresh ahead of expiry, e.g. `.8`. If refreshing keeps 
+    failing, the stale value is served for at most `max_stale` seconds past 
+    its expiry (defaults to `ttl`). Thereafter readers block to reload it and
+    get the factory's error if that fails too.
+    """
 
-    __slots__ = ()
+    __slots__ = '__proxy_lock__', '__proxy_ttl__', '__proxy_expires__', '__proxy_stale__', '__proxy_refreshing__',
 
     __proxy_target_val__: _TP
 
-    def __init__(self, fget: _T_Fget[_TP], /, **kwds) -> None:
+    def __init__(self, fget: _T_Fget[_TP], /, *, ttl: float=None, refresh: t.Union[bool, float]=False, max_stale: float=None, **kwds) -> None:
+        if refresh and not ttl:
+            raise ValueError(f'`refresh` requires a `ttl`.')
+        elif refresh is not True and not 0 <= (refresh or 0) <= 1:
+            raise ValueError(f'`refresh` must be a bool or a fraction of `ttl`. Got {refresh!r}.')
+        elif max_stale is not None and not refresh:
+            raise ValueError(f'`max_stale` requires `refresh`.')
+
         _set_own_attr(self, '__proxy_target_val__', _notset)
         _set_own_attr(self, '__proxy_func__', fget)
+        _set_own_attr(self, '__proxy_lock__', Lock())
+        _set_own_attr(self, '__proxy_ttl__', ttl and (
+            ttl, 
+            refresh and ttl * (1 if refresh is True else refresh),
+            ttl if max_stale is None else max_stale
+        ))
+        _set_own_attr(self, '__proxy_expires__', None)
+        _set_own_attr(self, '__proxy_stale__', None)
+        _set_own_attr(self, '__proxy_refreshing__', None)
 
     @property
     def __proxy_target__(self) -> _TP:
@@ -380,10 +485,197 @@ class CachedProxy(Proxy[_TP]):
         object behind the proxy at a time for performance reasons or because
         you want to pass the object into a different context.
         """
-        if self.__proxy_target_val__ is _notset:
-            _set_own_attr(self, '__proxy_target_val__', self.__proxy_func__())
+        if (rv := _cached_val(self)) is _notset:
+            return _cached_load(self)
+        elif (exp := _cached_expires(self)) is not None and monotonic() >= exp:
+            return _cached_expired(self, rv)
+        return rv
+
+    def __proxy_factory__(self) -> tuple[tuple, dict[str, t.Any]]:
+        args, kwds = super().__proxy_factory__()
+        if ttl := _cached_ttl(self):
+            kwds = dict(ttl=ttl[0], refresh=ttl[1] and ttl[1] / ttl[0])
+            ttl[1] and kwds.update(max_stale=ttl[2])
+        return args, kwds
+
+    def __proxy_invalidate__(self) -> None:
+        """Discard the cached target. It is resolved again on next access."""
+        with _cached_lock(self):
+            _set_own_attr(self, '__proxy_target_val__', _notset)
+            _set_own_attr(self, '__proxy_expires__', None)
+            _set_own_attr(self, '__proxy_refreshing__', None)
+
+    @classmethod
+    def __proxy_resolver__(cls) -> t.Callable[[Proxy[_TP]], _TP]:
+        if cls.__proxy_target__ is CachedProxy.__dict__['__proxy_target__']:
+            fget = cls.__proxy_target__.fget
+            def resolve(self):
+                if (rv := _cached_val(self)) is _notset or _cached_expires(self) is not None:
+                    return fget(self)
+                return rv
+            return resolve
+        return super().__proxy_resolver__()
+
+
+
+_cached_val = Proxy.__dict__['__proxy_target_val__'].__get__
+_cached_lock = CachedProxy.__dict__['__proxy_lock__'].__get__
+_cached_expires = CachedProxy.__dict__['__proxy_expires__'].__get__
+_cached_stale = CachedProxy.__dict__['__proxy_stale__'].__get__
+_cached_ttl = CachedProxy.__dict__['__proxy_ttl__'].__get__
+
+
+def _cached_set(self: CachedProxy, val):
+    # any load supersedes a refresh that's still running.
+    _set_own_attr(self, '__proxy_refreshing__', None)
+    _set_own_attr(self, '__proxy_target_val__', val)
+    if ttl := _cached_ttl(self):
+        now = monotonic()
+        _set_own_attr(self, '__proxy_expires__', now + (ttl[1] or ttl[0]))
+        ttl[1] and _set_own_attr(self, '__proxy_stale__', now + ttl[0] + ttl[2])
+
+
+def _cached_load(self: CachedProxy):
+    with _cached_lock(self):
+        if (rv := _cached_val(self)) is _notset \
+                or (exp := _cached_expires(self)) is not None and monotonic() >= exp:
+            _cached_set(self, rv := _object_getattribute(self, '__proxy_func__')())
+        return rv
+
+
+def _cached_expired(self: CachedProxy, stale):
+    if not _cached_ttl(self)[1]:
+        return _cached_load(self)
+    elif monotonic() >= _cached_stale(self):
+        return _cached_reload(self)
+
+    with _cached_lock(self):
+        if _object_getattribute(self, '__proxy_refreshing__') or _cached_expires(self) > monotonic():
+            return stale
+        _set_own_attr(self, '__proxy_refreshing__', token := object())
+    
+    try:
+        _refresh_executor().submit(_cached_refresh, self, token)
+    except RuntimeError:
+        # the executor is shut down (e.g. at exit).
+        with _cached_lock(self):
+            if _object_getattribute(self, '__proxy_refreshing__') is token:
+                _set_own_attr(self, '__proxy_refreshing__', None)
+    return stale
+
+
+@cache
+def _refresh_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(thread_name_prefix='ProxyRefresh')
+
+
+def _cached_refresh(self: CachedProxy, token: object):
+    try:
+        rv = _object_getattribute(self, '__proxy_func__')()
+    except Exception:
+        logger.exception(f'error refreshing proxy target')
+        rv = _notset
+
+    with _cached_lock(self):
+        if _object_getattribute(self, '__proxy_refreshing__') is not token:
+            # superseded by a newer load or an invalidation.
+            return
+        _set_own_attr(self, '__proxy_refreshing__', None)
+        if rv is not _notset:
+            _cached_set(self, rv)
+        elif (ttl := _cached_ttl(self)):
+            # keep serving the stale value and retry once the ttl elapses but
+            # no later than when it becomes too stale to serve.
+            _set_own_attr(self, '__proxy_expires__', min(monotonic() + ttl[0], _cached_stale(self)))
+
+
+def _cached_reload(self: CachedProxy):
+    # the stale value is past `max_stale`. Block to reload it and let errors
+    # propagate to the caller.
+    with _cached_lock(self):
+        if monotonic() >= _cached_stale(self):
+            _cached_set(self, _object_getattribute(self, '__proxy_func__')())
+        return _cached_val(self)
+
+
+
+class ProxyNotReadyError(RuntimeError):
+    """Raised when accessing an `AsyncCachedProxy` before its target is ready."""
+
+
+
+class AsyncCachedProxy(Proxy[_TP]):
+    """A proxy to the result of an async factory. 
+    
+    The target is initialised by `await proxy.__proxy_ready__()` or simply 
+    `await proxy`. Concurrent awaiters share a single call to `fget` and a 
+    failed initialisation is retried on the next await. Once ready, the 
+    target is accessed synchronously like a `CachedProxy`. Using the proxy 
+    before it is ready raises `ProxyNotReadyError` instead of blocking the 
+    event loop.
+    """
+
+    __slots__ = '__proxy_task__', '__proxy_lock__',
+
+    __proxy_func__: _T_AsyncFget[_TP]
+    __proxy_task__: t.Union[asyncio.Future[_TP], None]
+
+    def __init__(self, fget: _T_AsyncFget[_TP], /, **kwds) -> None:
+        _set_own_attr(self, '__proxy_target_val__', _notset)
+        _set_own_attr(self, '__proxy_func__', fget)
+        _set_own_attr(self, '__proxy_task__', None)
+        _set_own_attr(self, '__proxy_lock__', Lock())
+
+    @property
+    def __proxy_target__(self) -> _TP:
+        if (rv := _cached_val(self)) is _notset:
+            raise ProxyNotReadyError(
+                f'{type(self).__name__} is not ready. '
+                f'`await proxy` or `await proxy.__proxy_ready__()` first.'
+            )
+        return rv
+
+    async def __proxy_ready__(self) -> _TP:
+        """Initialise the target if not yet done and return it."""
+        if (rv := _cached_val(self)) is not _notset:
+            return rv
+
+        with _async_cached_lock(self):
+            if (task := _object_getattribute(self, '__proxy_task__')) is None:
+                task = asyncio.ensure_future(_object_getattribute(self, '__proxy_func__')())
+                task.add_done_callback(partial(_async_cached_done, self))
+                _set_own_attr(self, '__proxy_task__', task)
+
+        # shield the shared task from the cancellation of any single awaiter.
+        return await asyncio.shield(task)
+
+    def __proxy_invalidate__(self) -> None:
+        """Discard the target. It must be awaited again before use."""
+        with _async_cached_lock(self):
+            _set_own_attr(self, '__proxy_target_val__', _notset)
+            _set_own_attr(self, '__proxy_task__', None)
+
+    def __await__(self):
+        return self.__proxy_ready__().__await__()
+
+    def __repr__(self):
+        if (rv := _cached_val(self)) is _notset:
+            return f'{type(self).__name__}(<not ready>)'
+        return f'{type(self).__name__}({rv!r})'
+
 
-        return self.__proxy_target_val__
+
+_async_cached_lock = AsyncCachedProxy.__dict__['__proxy_lock__'].__get__
+
+
+def _async_cached_done(self: AsyncCachedProxy, task: asyncio.Future):
+    with _async_cached_lock(self):
+        if _object_getattribute(self, '__proxy_task__') is not task:
+            return
+        elif task.cancelled() or task.exception() is not None:
+            _set_own_attr(self, '__proxy_task__', None)
+        else:
+            _set_own_attr(self, '__proxy_target_val__', task.result())
 
 
 
@@ -396,6 +688,14 @@ class WeakProxy(CachedProxy[_TP]):
     def __init__(self, fget: _T_Fget[_TP], /, **kwds) -> None:
         _set_own_attr(self, '__proxy_target_val__', _notset_ref)
         _set_own_attr(self, '__proxy_func__', fget)
+        _set_own_attr(self, '__proxy_lock__', Lock())
+        _set_own_attr(self, '__proxy_ttl__', None)
+        _set_own_attr(self, '__proxy_expires__', None)
+        _set_own_attr(self, '__proxy_stale__', None)
+        _set_own_attr(self, '__proxy_refreshing__', None)
+
+    def __proxy_invalidate__(self) -> None:
+        _set_own_attr(self, '__proxy_target_val__', _notset_ref)
 
     @property
     def __proxy_target__(self) -> _TP:
@@ -429,6 +729,58 @@ class ValueProxy(Proxy[_TP]):
         val = self.__proxy_target__
         return lambda: val
 
+    @classmethod
+    def __proxy_resolver__(cls) -> t.Callable[[Proxy[_TP]], _TP]:
+        return ValueProxy.__dict__['__proxy_target__'].__get__
+
+    def __proxy_factory__(self) -> tuple[tuple, dict[str, t.Any]]:
+        return (_object_getattribute(self, '__proxy_target__'),), {}
+
+
+
+
+class ContextProxy(Proxy[_TP]):
+    """A proxy to the current value of a `contextvars.ContextVar`.
+    
+    `var` can be a `ContextVar` or a name to create one with the given 
+    `default`. Since the target is resolved with a single `ContextVar.get()`, 
+    each thread and asyncio task sees its own value.
+
+        tenant = ContextProxy('tenant')
+        token = tenant.__proxy_set__(Tenant('acme'))
+        try:
+            ...
+        finally:
+            tenant.__proxy_reset__(token)
+    """
+
+    __slots__ = '__proxy_var__',
+
+    __proxy_var__: ContextVar[_TP]
+
+    def __init__(self, var: t.Union[ContextVar[_TP], str], /, *, default: _TP=_notset, **kwds) -> None:
+        if not isinstance(var, ContextVar):
+            var = ContextVar(var) if default is _notset else ContextVar(var, default=default)
+        _set_own_attr(self, '__proxy_var__', var)
+        _set_own_attr(self, '__proxy_func__', var.get)
+
+    def __proxy_set__(self, value: _TP) -> Token[_TP]:
+        """Set the value in the current context. Returns a `Token` that can be
+        passed to `__proxy_reset__()` to restore the previous value.
+        """
+        return _object_getattribute(self, '__proxy_var__').set(value)
+
+    def __proxy_reset__(self, token: Token[_TP]) -> None:
+        _object_getattribute(self, '__proxy_var__').reset(token)
+
+    def __proxy_factory__(self) -> tuple[tuple, dict[str, t.Any]]:
+        return (_object_getattribute(self, '__proxy_var__'),), {}
+
+    def __repr__(self):
+        var = _object_getattribute(self, '__proxy_var__')
+        val = var.get(_notset)
+        return f'{type(self).__name__}({var.name}{"" if val is _notset else f"={val!r}"})'
+
 
 
 
@@ -461,6 +813,178 @@ class WeakCallableProxy(WeakProxy[_TP], CallableProxy[_TP]):
 
 
 
+_unary_ops = {
+    '__str__': str,
+    '__bytes__': bytes,
+    '__hash__': hash,
+    '__bool__': bool,
+    '__len__': len,
+    '__length_hint__': operator.length_hint,
+    '__iter__': iter,
+    '__next__': next,
+    '__reversed__': reversed,
+    '__neg__': operator.neg,
+    '__pos__': operator.pos,
+    '__abs__': abs,
+    '__invert__': operator.invert,
+    '__complex__': complex,
+    '__int__': int,
+    '__float__': float,
+    '__index__': operator.index,
+    '__trunc__': math.trunc,
+    '__floor__': math.floor,
+    '__ceil__': math.ceil,
+}
+
+_binary_ops = {
+    '__format__': format,
+    '__lt__': operator.lt,
+    '__le__': operator.le,
+    '__eq__': operator.eq,
+    '__ne__': operator.ne,
+    '__gt__': operator.gt,
+    '__ge__': operator.ge,
+    '__getitem__': operator.getitem,
+    '__delitem__': operator.delitem,
+    '__contains__': operator.contains,
+    '__add__': operator.add,
+    '__sub__': operator.sub,
+    '__mul__': operator.mul,
+    '__matmul__': operator.matmul,
+    '__truediv__': operator.truediv,
+    '__floordiv__': operator.floordiv,
+    '__mod__': operator.mod,
+    '__divmod__': divmod,
+    '__pow__': pow,
+    '__lshift__': operator.lshift,
+    '__rshift__': operator.rshift,
+    '__and__': operator.and_,
+    '__xor__': operator.xor,
+    '__or__': operator.or_,
+}
+
+_reflected_ops = {
+    f'__r{n[2:]}': op for n, op in _binary_ops.items() 
+        if n[2:-2] in ('add', 'sub', 'mul', 'matmul', 'truediv', 'floordiv', 'mod', 'divmod', 
+            'pow', 'lshift', 'rshift', 'and', 'xor', 'or')
+}
+
+_inplace_ops = {
+    '__iadd__': operator.iadd,
+    '__isub__': operator.isub,
+    '__imul__': operator.imul,
+    '__imatmul__': operator.imatmul,
+    '__itruediv__': operator.itruediv,
+    '__ifloordiv__': operator.ifloordiv,
+    '__imod__': operator.imod,
+    '__ipow__': operator.ipow,
+    '__ilshift__': operator.ilshift,
+    '__irshift__': operator.irshift,
+    '__iand__': operator.iand,
+    '__ixor__': operator.ixor,
+    '__ior__': operator.ior,
+}
+
+_forwarded_methods = (
+    '__call__', '__setitem__', '__round__', '__enter__', '__exit__', 
+    '__await__', '__aiter__', '__anext__', '__aenter__', '__aexit__',
+)
+
+
+_proxy_classes: WeakKeyDictionary[type, dict[type[Proxy], type[Proxy]]] = WeakKeyDictionary()
+_proxy_classes_lock = Lock()
+
+
+def proxy_class_for(cls: type, base: type[Proxy]=None) -> type[Proxy]:
+    """Return a proxy class specialized for targets of type `cls`.
+
+    The class is generated once (and cached) as a subclass of `base` 
+    (defaults to `SimpleProxy`). Instead of `_ProxyLookup` descriptors, every 
+    special method supported by `cls` is a plain function that forwards 
+    directly to the target, resolved by `base.__proxy_resolver__()` which is
+    bound in the function's closure. Special methods `cls` does not define
+    are left to `base`. The cache is weakly keyed by `cls` and won't keep 
+    dynamically created classes alive.
+    """
+    if base is None:
+        base = SimpleProxy
+    
+    try:
+        return _proxy_classes[cls][base]
+    except KeyError:
+        pass
+
+    if not isproxytype(base, Proxy):
+        raise TypeError(f'base must be a subclass of Proxy. Got {base!r}.')
+
+    with _proxy_classes_lock:
+        classes = _proxy_classes.setdefault(cls, {})
+        if (rv := classes.get(base)) is None:
+            rv = classes[base] = _make_proxy_class(cls, base)
+        return rv
+
+
+def _make_proxy_class(cls: type, base: type[Proxy]) -> type[Proxy]:
+    ns, lines = {}, []
+    args = {
+        '_target': base.__proxy_resolver__(), 
+        '_oga': _object_getattribute, 
+        '_proxy_attrs': _proxy_attrs,
+    }
+
+    lines.append(
+        'def __getattribute__(self, name):\n'
+        '  if name in _proxy_attrs:\n'
+        '    return _oga(self, name)\n'
+        '  return getattr(_target(self), name)'
+    )
+    lines.append('def __setattr__(self, name, value):\n  setattr(_target(self), name, value)')
+    lines.append('def __delattr__(self, name):\n  delattr(_target(self), name)')
+    lines.append('def __dir__(self):\n  return dir(_target(self))')
+
+    for name, op in _unary_ops.items():
+        if name == '__hash__' and cls.__hash__ is None:
+            ns[name] = None
+        elif name == '__bool__' or hasattr(cls, name):
+            args[f'_{name}'] = op
+            lines.append(f'def {name}(self):\n  return _{name}(_target(self))')
+
+    for name, op in _binary_ops.items():
+        if hasattr(cls, name):
+            args[f'_{name}'] = op
+            lines.append(f'def {name}(self, other):\n  return _{name}(_target(self), other)')
+
+    for name, op in _reflected_ops.items():
+        if hasattr(cls, name):
+            args[f'_{name}'] = op
+            lines.append(f'def {name}(self, other):\n  return _{name}(other, _target(self))')
+
+    for name, op in _inplace_ops.items():
+        if hasattr(cls, name):
+            args[f'_{name}'] = op
+            lines.append(f'def {name}(self, other):\n  _{name}(_target(self), other)\n  return self')
+
+    for name in _forwarded_methods:
+        if hasattr(cls, name):
+            lines.append(f'def {name}(self, *args, **kwds):\n  return _target(self).{name}(*args, **kwds)')
+
+    names = [ln[4:ln.index('(')] for ln in lines]
+    body = '\n'.join(f'  {ln}' for src in lines for ln in src.splitlines())
+    src = f'def __create_fn__({", ".join(args)}):\n{body}\n  return {{{", ".join(f"{n!r}: {n}" for n in names)}}}'
+    
+    local = {}
+    exec(src, {}, local)
+    ns.update(local['__create_fn__'](**args))
+    
+    qualname = f'{base.__name__}[{cls.__qualname__}]'
+    for fn in ns.values():
+        if fn is not None:
+            fn.__qualname__ = f'{qualname}.{fn.__name__}'
+
+    ns.update(__slots__=(), __module__=base.__module__, __qualname__=qualname, __proxy_type__=weakref(cls))
+    return type(base)(qualname, (base,), ns)
+
+
 def unproxy(val: t.Union[Proxy[_TP], _TP]) -> _TP:
     return getattr(val, '__proxy_target__', val)
 
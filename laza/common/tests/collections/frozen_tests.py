@@ -0,0 +1,85 @@
+import pickle
+import pytest
+
+from copy import copy, deepcopy
+from ...collections import frozendict, frozenorderedset, orderedset, Arguments
+
+xfail = pytest.mark.xfail
+parametrize = pytest.mark.parametrize
+
+
+
+class FrozenDictTests:
+
+    def test_copy(self):
+        o = frozendict(a=1, b=(1, 2), c=frozendict(x=(1,)))
+
+        assert copy(o) is o
+        assert deepcopy(o) is o
+        assert o.copy() is not o and o.copy() == o
+
+    def test_deepcopy_shares_unchanged(self):
+        inner = frozendict(x=(1, 2))
+        o = frozendict(a=inner, b=[1, 2])
+
+        c = deepcopy(o)
+
+        assert c is not o and c == o
+        assert c['a'] is inner
+        assert c['b'] is not o['b']
+
+    def test_pickle(self):
+        o = frozendict(a=1, b=(1, 2), c=frozendict(x=[1]))
+        c = pickle.loads(pickle.dumps(o))
+
+        assert c == o
+        assert type(c) is frozendict
+        assert type(c['c']) is frozendict
+
+
+
+class FrozenOrderedSetTests:
+
+    def test_copy(self):
+        o = frozenorderedset([1, 'a', (2, 3)])
+
+        assert copy(o) is o
+        assert deepcopy(o) is o
+
+        class Foo:
+            pass
+
+        m = frozenorderedset([1, Foo()])
+        c = deepcopy(m)
+        assert c is not m
+        assert c[0] == 1 and isinstance(c[1], Foo) and c[1] is not m[1]
+
+    def test_pickle(self):
+        for cls in (frozenorderedset, orderedset):
+            o = cls([3, 1, 2])
+            c = pickle.loads(pickle.dumps(o))
+            assert type(c) is cls
+            assert tuple(c) == (3, 1, 2)
+
+
+
+class ArgumentsTests:
+
+    def test_copy(self):
+        o = Arguments((1, 2), dict(a=1, b='b'))
+
+        assert copy(o) is o
+        assert deepcopy(o) is o
+
+        m = Arguments(([1],), dict(a=1))
+        c = deepcopy(m)
+        assert c is not m
+        assert c.args == m.args and c.kwargs is m.kwargs
+
+    def test_pickle(self):
+        o = Arguments((1, 2), dict(a=1, b='b'))
+        c = pickle.loads(pickle.dumps(o))
+
+        assert c.args == o.args
+        assert c.kwargs == o.kwargs
+        assert hash(c) == hash(o)
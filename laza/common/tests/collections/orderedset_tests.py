@@ -0,0 +1,114 @@
+import pickle
+import pytest
+
+from ...collections import orderedset, intorderedset
+
+xfail = pytest.mark.xfail
+parametrize = pytest.mark.parametrize
+
+
+
+class IntOrderedSetTests:
+
+    def test_basic(self):
+        o = intorderedset([5, 3, 9, 3, 0])
+
+        assert isinstance(o, orderedset)
+        assert len(o) == 4
+        assert tuple(o) == (5, 3, 9, 0)
+        assert tuple(reversed(o)) == (0, 9, 3, 5)
+        assert all((v in o) for v in (5, 3, 9, 0))
+        assert not any((v in o) for v in (1, 100, -1, 'a', None))
+        assert o[1] == 3 and o[-1] == 0
+        assert tuple(o[1:]) == (3, 9, 0)
+        assert o.index(9) == 2
+
+        with pytest.raises(ValueError):
+            o.add(-1)
+
+    def test_mutation(self):
+        o = intorderedset([5, 3, 9])
+        o.add(1)
+        o.add(3)
+        o.remove(5)
+        o.discard(100)
+
+        assert tuple(o) == (3, 9, 1)
+        assert 5 not in o
+
+        assert o.pop() == 1
+        assert 1 not in o
+
+        with pytest.raises(KeyError):
+            o.remove(100)
+
+        o.clear()
+        assert not o
+        with pytest.raises(KeyError):
+            o.pop()
+
+    def test_set_ops(self):
+        o = intorderedset([5, 3, 9, 0])
+        s = orderedset([5, 3, 9, 0])
+
+        assert o == s and s == o
+        assert o == intorderedset([0, 3, 5, 9])
+        assert o != intorderedset([0, 3, 5])
+
+        assert tuple(o & [3, 9, 11]) == tuple(s & [3, 9, 11])
+        assert tuple(o | [11, 3]) == tuple(s | [11, 3])
+        assert tuple(o - {3}) == tuple(s - {3})
+        assert tuple(o ^ [3, 11]) == tuple(s ^ [3, 11])
+        assert o < {0, 3, 5, 9, 10}
+        assert o <= s and s >= o
+
+        o |= [7, 8]
+        o &= {7, 5, 0}
+        assert tuple(o) == (5, 0, 7)
+        o ^= [7, 1]
+        assert tuple(o) == (5, 0, 1)
+        o -= [1]
+        assert tuple(o) == (5, 0)
+
+    def test_pickle(self):
+        o = intorderedset([4, 1, 1000])
+        c = pickle.loads(pickle.dumps(o))
+
+        assert type(c) is intorderedset
+        assert tuple(c) == (4, 1, 1000)
+        assert 1000 in c
+
+    def test_large_members(self):
+        o = intorderedset([2**33, 1, 2**62, 1])
+
+        assert tuple(o) == (2**33, 1, 2**62)
+        assert len(o.__bits__) == 1
+        assert 2**33 in o and 2**34 not in o
+        
+        o.remove(2**33)
+        assert o.pop() == 2**62
+        assert tuple(o) == (1,)
+
+        with pytest.raises(ValueError):
+            intorderedset([2**63])
+
+    def test_numeric_members(self):
+        o = intorderedset([3, 5])
+        s = orderedset([3, 5])
+
+        for v in (3.0, 5, 3.5, '3', None, float('inf'), float('nan')):
+            assert (v in o) == (v in s)
+
+        o.remove(3.0)
+        assert tuple(o) == (5,)
+        with pytest.raises(TypeError):
+            o.add(4.0)
+
+    def test_compare_no_notimplemented(self, recwarn):
+        o = intorderedset([5, 3])
+        s = orderedset([5, 3])
+
+        assert o <= s and o >= s and s <= o and not o < s
+        assert o <= {3, 5, 9} and not o >= {3, 5, 9}
+        assert o != 5 and s != 5
+        assert not any(issubclass(w.category, DeprecationWarning) for w in recwarn)
@@ -0,0 +1,1051 @@
+import asyncio
+import copy
+import gc
+import os
+import pickle
+import pytest
+import time
+import weakref
+
+from functools import lru_cache, partial
+from threading import Thread, Barrier
+from ..functools import (
+    cached_property, slot_cached_property, add_cached_slots,
+    async_cached_property, async_cache, cached_class_property,
+    memoize, typedkey, coalesce, lookup_property, method_decorator,
+    idgenerator, uniqueid, ProfileRegistry,
+)
+
+
+
+xfail = pytest.mark.xfail
+parametrize = pytest.mark.parametrize
+
+
+
+
+def _run_threads(target, n):
+    barrier = Barrier(n)
+
+    def run(i):
+        barrier.wait()
+        target(i)
+
+    threads = [Thread(target=run, args=(i,)) for i in range(n)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+
+
+
+class CachedPropertyTests:
+
+    def test_basic(self):
+
+        calls = []
+
+        class Foo:
+            @cached_property
+            def foo(self):
+                calls.append(1)
+                return len(calls)
+
+        foo = Foo()
+        assert foo.foo == 1
+        assert foo.foo == 1
+        
+        foo.foo = 10
+        assert foo.foo == 10
+
+        del foo.foo
+        assert foo.foo == 2
+        assert len(Foo.foo.locks) == 1
+
+        del foo
+        gc.collect()
+        assert not Foo.foo.locks
+
+    def test_threaded(self):
+
+        calls = []
+
+        class Foo:
+            @cached_property
+            def foo(self):
+                calls.append(self)
+                time.sleep(.01)
+                return id(self)
+
+        shared = Foo()
+        _run_threads(lambda i: shared.foo, 8)
+        assert calls == [shared]
+        
+        calls.clear()
+        foos = [Foo() for _ in range(8)]
+        _run_threads(lambda i: foos[i].foo, 8)
+        
+        assert len(calls) == 8
+        assert all(f.foo == id(f) for f in foos)
+
+        del foos, calls[:]
+        gc.collect()
+        assert list(Foo.foo.locks) == [id(shared)]
+
+    def test_setter_exclusive(self):
+        active, peak = [], []
+
+        class Foo:
+            @cached_property
+            def foo(self):
+                return 0
+
+            @foo.setter
+            def foo(self, value):
+                active.append(value)
+                peak.append(len(active))
+                time.sleep(.005)
+                active.remove(value)
+                self.__dict__['foo'] = value
+
+            def nested(self):
+                with Foo.foo.instance_lock(self):
+                    self.foo = -1
+
+        shared = Foo()
+        _run_threads(lambda i: setattr(shared, 'foo', i), 8)
+        assert max(peak) == 1 and len(peak) == 8
+
+        lock = Foo.foo.instance_lock(shared)
+        shared.nested()
+        assert Foo.foo.instance_lock(shared) is lock
+        assert shared.foo == -1
+
+    def test_no_weakref_no_contention(self):
+        barrier = Barrier(8, timeout=2)
+
+        @add_cached_slots
+        class Foo:
+            __slots__ = ()
+
+            @slot_cached_property
+            def foo(self):
+                # deadlocks (breaks the barrier) if instances share a lock.
+                barrier.wait()
+                return id(self)
+
+        foos, locks = [], set()
+        for foo in [Foo() for _ in range(256)]:
+            if (lock := Foo.foo.instance_lock(foo)) not in locks:
+                locks.add(lock)
+                foos.append(foo)
+        foos = foos[:8]
+        assert len(foos) == 8
+
+        _run_threads(lambda i: foos[i].foo, 8)
+        assert all(f.foo == id(f) for f in foos)
+        assert not Foo.foo.locks
+
+    def test_speed(self):
+        n = 64
+        delay = .002
+        
+        class Foo:
+            @cached_property
+            def foo(self):
+                time.sleep(delay)
+                return 42
+
+        print('')
+        for nthreads in (1, 2, 4, 8, 16):
+            foos = [Foo() for _ in range(n * nthreads)]
+
+            def target(i):
+                for foo in foos[i*n:(i+1)*n]:
+                    foo.foo
+
+            start = time.perf_counter()
+            _run_threads(target, nthreads)
+            took = time.perf_counter() - start
+            print(f' - {nthreads:>2} threads: {round(len(foos)/took):>8,} computes/sec')
+
+
+
+class SlotCachedPropertyTests:
+
+    def test_basic(self):
+
+        calls = []
+
+        @add_cached_slots
+        class Foo:
+            __slots__ = 'a',
+
+            def __init__(self, a):
+                self.a = a
+
+            @slot_cached_property
+            def double(self):
+                calls.append(self.a)
+                return self.a * 2
+
+            def __repr__(self):
+                return super().__repr__()
+
+        foo = Foo(2)
+
+        assert not hasattr(foo, '__dict__')
+        assert foo.double == 4
+        assert foo.double == 4
+        assert calls == [2]
+        assert repr(foo)
+
+        del foo.double
+        assert foo.double == 4
+        assert calls == [2, 2]
+
+        foo.double = 10
+        assert foo.double == 10
+
+        class Bar(Foo):
+            __slots__ = ()
+
+        assert Bar(3).double == 6
+
+    def test_declared_slot(self):
+
+        class Foo:
+            __slots__ = 'cache',
+
+            @slot_cached_property(slot='cache', readonly=True).getter
+            def foo(self):
+                return 42
+
+        foo = Foo()
+        assert foo.foo == 42
+        assert foo.cache == 42
+
+        with pytest.raises(AttributeError):
+            foo.foo = 1
+
+    def test_missing_slot(self):
+
+        class Foo:
+            __slots__ = ()
+
+            @slot_cached_property
+            def foo(self):
+                return 42
+
+        with pytest.raises(TypeError):
+            Foo().foo
+
+
+
+class AsyncCachedPropertyTests:
+
+    def test_basic(self):
+
+        calls = []
+
+        class Foo:
+            @async_cached_property
+            async def foo(self):
+                calls.append(self)
+                await asyncio.sleep(.01)
+                return len(calls)
+
+        async def main():
+            foo = Foo()
+            assert await asyncio.gather(*(foo.foo for _ in range(10))) == [1] * 10
+            assert await foo.foo == 1
+
+            del foo.foo
+            assert await foo.foo == 2
+
+            with pytest.raises(AttributeError):
+                foo.foo = 5
+
+        asyncio.run(main())
+        assert len(calls) == 2
+
+    def test_failure_and_ttl(self):
+
+        calls = []
+
+        class Foo:
+            @async_cached_property(ttl=.02).getter
+            async def foo(self):
+                calls.append(1)
+                if len(calls) == 1:
+                    raise ValueError('first call fails')
+                return len(calls)
+
+        async def main():
+            foo = Foo()
+            with pytest.raises(ValueError):
+                await foo.foo
+            await asyncio.sleep(0)
+            assert await foo.foo == 2
+            assert await foo.foo == 2
+            await asyncio.sleep(.03)
+            assert await foo.foo == 3
+
+        asyncio.run(main())
+
+
+
+class AsyncCacheTests:
+
+    def test_basic(self):
+
+        calls = []
+
+        @async_cache
+        async def func(a, b=1):
+            calls.append((a, b))
+            await asyncio.sleep(.01)
+            return a + b
+
+        async def main():
+            res = await asyncio.gather(*(func(i % 2, b=2) for i in range(10)))
+            assert res == [2, 3] * 5
+            assert await func(1, b=2) == 3
+            assert len(calls) == 2
+
+            func.cache_clear()
+            assert await func(1, b=2) == 3
+            assert len(calls) == 3
+
+        asyncio.run(main())
+
+    def test_cancelled_awaiter(self):
+
+        @async_cache
+        async def func():
+            await asyncio.sleep(.02)
+            return 42
+
+        async def main():
+            t1 = asyncio.ensure_future(func())
+            t2 = asyncio.ensure_future(func())
+            await asyncio.sleep(0)
+            t1.cancel()
+            assert await t2 == 42
+            assert t1.cancelled()
+
+        asyncio.run(main())
+
+    def test_eviction(self):
+
+        calls = []
+
+        @async_cache(maxsize=2, ttl=.02)
+        async def func(a):
+            calls.append(a)
+            if a < 0:
+                raise ValueError(a)
+            return a
+
+        async def main():
+            for a in (1, 2, 1, 3, 1, 2):
+                assert await func(a) == a
+            assert calls == [1, 2, 3, 2]
+
+            await asyncio.sleep(.03)
+            assert await func(1) == 1
+            assert calls == [1, 2, 3, 2, 1]
+
+            for _ in range(2):
+                with pytest.raises(ValueError):
+                    await func(-1)
+                await asyncio.sleep(0)
+            assert calls.count(-1) == 2
+
+        asyncio.run(main())
+
+    def test_refreshed_entry_is_recent(self):
+
+        calls = []
+
+        @async_cache(maxsize=2, ttl=.02)
+        async def func(a):
+            calls.append(a)
+            return a
+
+        async def main():
+            await func(1)
+            await func(2)
+            await asyncio.sleep(.03)
+            await func(2)
+            await func(1)
+            await func(3)
+            await func(1)
+            assert calls == [1, 2, 2, 1, 3]
+
+        asyncio.run(main())
+
+    def test_purge_expired(self):
+
+        class Arg:
+            pass
+
+        @async_cache(ttl=.01)
+        async def func(a):
+            pass
+
+        async def main():
+            refs = []
+            for _ in range(64):
+                a = Arg()
+                refs.append(weakref.ref(a))
+                await func(a)
+            del a
+            await asyncio.sleep(.02)
+            for _ in range(64):
+                await func(Arg())
+            gc.collect()
+            assert not any(r() for r in refs)
+
+        asyncio.run(main())
+
+
+
+class CachedClassPropertyTests:
+
+    def test_basic(self):
+
+        calls = []
+
+        class Foo:
+            @cached_class_property
+            def name(cls):
+                calls.append(cls)
+                return cls.__name__.lower()
+
+        class Bar(Foo):
+            pass
+
+        assert Foo.name == 'foo'
+        assert Foo().name == 'foo'
+        assert Bar.name == 'bar'
+        assert Foo.name == 'foo'
+        assert calls == [Foo, Bar]
+
+        assert vars(Foo)['name'].invalidate(Foo) is True
+        assert vars(Foo)['name'].invalidate(Foo) is False
+        assert Foo.name == 'foo'
+        assert Bar.name == 'bar'
+        assert calls == [Foo, Bar, Foo]
+
+    def test_weak(self):
+
+        class Foo:
+            @cached_class_property
+            def name(cls):
+                return cls.__name__
+
+        prop = vars(Foo)['name']
+
+        for i in range(5):
+            assert type(f'Foo{i}', (Foo,), {}).name == f'Foo{i}'
+
+        gc.collect()
+        assert list(prop.cache.keys()) == []
+
+    def test_threaded(self):
+
+        calls = []
+
+        class Foo:
+            @cached_class_property
+            def name(cls):
+                calls.append(cls)
+                time.sleep(.01)
+                return cls.__name__
+
+        _run_threads(lambda i: Foo.name, 8)
+        assert calls == [Foo]
+
+
+
+class MemoizeTests:
+
+    def test_basic(self):
+
+        calls = []
+
+        @memoize
+        def func(a, b=1):
+            """func docs"""
+            calls.append((a, b))
+            return a + b
+
+        assert func.__name__ == 'func'
+        assert func.__doc__ == 'func docs'
+
+        assert func(1) == 2
+        assert func(1) == 2
+        assert func(1, b=2) == 3
+        assert calls == [(1, 1), (1, 2)]
+        
+        info = func.cache_info()
+        assert (info.hits, info.misses, info.currsize, info.evictions) == (1, 2, 2, 0)
+
+        func.cache_clear(lambda k, v: v == 3)
+        assert func.cache_info().currsize == 1
+        assert func(1) == 2
+        assert func(1, b=2) == 3
+        assert calls == [(1, 1), (1, 2), (1, 2)]
+
+        func.cache_clear()
+        assert func.cache_info() == (0, 0, None, 0, 0)
+
+    def test_lru_and_ttl(self):
+
+        calls = []
+
+        @memoize(maxsize=2, ttl=.02)
+        def func(a):
+            calls.append(a)
+            return a
+
+        for a in (1, 2, 1, 3, 1, 2):
+            assert func(a) == a
+
+        assert calls == [1, 2, 3, 2]
+        assert func.cache_info().evictions == 2
+
+        time.sleep(.03)
+        assert func(1) == 1
+        assert calls == [1, 2, 3, 2, 1]
+
+    def test_ttl_bounded(self):
+
+        @memoize(ttl=.01)
+        def func(a):
+            return a
+
+        for i in range(10):
+            for a in range(64):
+                func((i, a))
+            assert func.cache_info().currsize <= 128
+            time.sleep(.02)
+
+        assert func.cache_info().evictions >= 8 * 64
+
+    def test_getsizeof(self):
+
+        @memoize(maxsize=10, getsizeof=len)
+        def func(n):
+            return 'x' * n
+
+        func(4), func(4), func(5)
+        assert func.cache_info().currsize == 9
+
+        func(3)
+        info = func.cache_info()
+        assert (info.currsize, info.evictions) == (8, 1)
+
+        func(11)
+        assert func.cache_info().currsize == 8
+
+    def test_methods(self):
+
+        calls = []
+
+        class Foo:
+
+            def __init__(self, n):
+                self.n = n
+
+            @memoize(key=typedkey)
+            def mul(self, a):
+                calls.append((self.n, a))
+                return self.n * a
+
+        foo, bar = Foo(2), Foo(3)
+
+        assert foo.mul(2) == 4
+        assert foo.mul(2) == 4
+        assert bar.mul(2) == 6
+        assert foo.mul(2.0) == 4.0
+        assert len(calls) == 3
+        assert Foo.mul.cache_info().currsize == 3
+
+        del foo
+        gc.collect()
+        assert len(Foo.mul.instances) == 1
+        assert Foo.mul.cache_info().currsize == 1
+
+
+
+class CoalesceTests:
+
+    def test_threaded(self):
+
+        calls = []
+
+        @coalesce
+        def func(a):
+            calls.append(a)
+            time.sleep(.02)
+            return [a]
+
+        results = [None] * 8
+
+        def target(i):
+            results[i] = func(i % 2)
+
+        _run_threads(target, 8)
+
+        assert sorted(calls) == [0, 1]
+        assert results[0] is results[2] and results[1] is results[3]
+        assert func.coalesce_info() == (8, 6, 0)
+
+        assert func(0) == [0]
+        assert len(calls) == 3
+
+    def test_threaded_error(self):
+
+        @coalesce
+        def func():
+            time.sleep(.02)
+            raise ValueError('fail')
+
+        errors = []
+
+        def target(i):
+            try:
+                func()
+            except ValueError as e:
+                errors.append(e)
+
+        _run_threads(target, 4)
+        assert len(errors) == 4
+        assert func.coalesce_info().inflight == 0
+
+    def test_async(self):
+
+        calls = []
+
+        @coalesce
+        async def func(a):
+            calls.append(a)
+            await asyncio.sleep(.01)
+            return [a]
+
+        async def main():
+            res = await asyncio.gather(*(func(i % 2) for i in range(8)))
+            assert sorted(calls) == [0, 1]
+            assert res[0] is res[2] and res[1] is res[3]
+            assert func.coalesce_info() == (8, 6, 0)
+
+            assert await func(0) == [0]
+            assert len(calls) == 3
+
+        asyncio.run(main())
+
+
+
+class LookupPropertyTests:
+
+    def test_basic(self):
+
+        class Foo:
+            a = lookup_property('_a')
+            b = lookup_property('x.y', 'data')
+            c = lookup_property('c', 'data', default=None)
+            d = lookup_property('list[1]', 'data', fget=lambda s, v: v * 2)
+
+            def __init__(self, a, data):
+                self._a = a
+                self.data = data
+
+        foo = Foo(1, dict(x=dict(y='xy'), list=[1, 2]))
+
+        assert foo.a == 1
+        assert foo.b == 'xy'
+        assert foo.c is None
+        assert foo.d == 4
+
+        foo.b = 'yx'
+        assert foo.data['x']['y'] == 'yx'
+
+        del foo.data['x']['y']
+        with pytest.raises(AttributeError):
+            foo.b
+
+    def test_compiled_once(self, monkeypatch):
+        from .. import data
+
+        class Foo:
+            a = lookup_property('a.b', lambda s: s.src)
+
+            def __init__(self, src):
+                self.src = src
+
+        def fail(*a, **kw):
+            raise AssertionError('getitem called')
+
+        monkeypatch.setattr(data, 'getitem', fail)
+        monkeypatch.setattr(data, 'DataPath', fail)
+
+        class Obj:
+            b = 'attr'
+
+        assert Foo(dict(a=dict(b=1))).a == 1
+        assert Foo(dict(a=Obj())).a == 'attr'
+
+
+
+class _Multiplier:
+
+    def __init__(self, n):
+        self.n = n
+
+    @method_decorator(memoize, per_instance=True)
+    def mul(self, a):
+        return self.n * a
+
+
+
+class MethodDecoratorTests:
+
+    def test_per_instance(self):
+
+        decorated = []
+
+        def counting(func):
+            decorated.append(func)
+            return memoize(func)
+
+        class Foo:
+
+            def __init__(self, n):
+                self.n = n
+
+            @method_decorator(counting, per_instance=True)
+            def mul(self, a):
+                """mul docs"""
+                return self.n * a
+
+        foo, bar = Foo(2), Foo(3)
+
+        assert Foo.mul.__doc__ == 'mul docs'
+        assert foo.mul.__name__ == 'mul'
+        assert foo.mul(2) == foo.mul(2) == 4
+        assert bar.mul(2) == 6
+        assert foo.mul is foo.mul
+        assert len(decorated) == 2
+        assert foo.mul.cache_info().currsize == 1
+
+        ref = weakref.ref(foo)
+        del foo
+        assert ref() is None
+
+    def test_per_instance_slots(self):
+
+        class Foo:
+            __slots__ = 'n', '__weakref__'
+
+            def __init__(self, n):
+                self.n = n
+
+            def mul(self, a):
+                return self.n * a
+
+        Foo = method_decorator(memoize, 'mul', per_instance=True)(Foo)
+        foo = Foo(2)
+
+        assert foo.mul(3) == 6
+        assert foo.mul is foo.mul
+        assert len(vars(Foo)['mul'].instances) == 1
+
+        del foo
+        gc.collect()
+        assert not vars(Foo)['mul'].instances
+
+    def test_per_instance_binding(self):
+
+        class Foo:
+
+            @method_decorator(memoize, per_instance=True)
+            @classmethod
+            def kind(cls, a):
+                return cls, a
+
+            @method_decorator(memoize, per_instance=True)
+            @staticmethod
+            def add(a, b):
+                return a + b
+
+        foo = Foo()
+        assert foo.kind(1) == (Foo, 1)
+        assert foo.add(1, 2) == 3
+
+    def test_per_instance_copy_pickle(self):
+        foo = _Multiplier(2)
+        assert foo.mul(3) == 6
+        assert vars(foo) == {'n': 2}
+
+        bar = copy.copy(foo)
+        bar.n = 5
+        assert bar.mul(3) == 15
+        assert foo.mul(3) == 6
+
+        baz = pickle.loads(pickle.dumps(foo))
+        baz.n = 7
+        assert baz.mul(3) == 21
+        assert vars(baz) == {'n': 7}
+
+
+
+class IdGeneratorTests:
+
+    def test_threaded(self):
+        gen = idgenerator(blocksize=16)
+        results = [None] * 8
+
+        def target(i):
+            results[i] = [gen() for _ in range(1000)]
+
+        _run_threads(target, 8)
+
+        ids = [v for r in results for v in r]
+        assert len(set(ids)) == len(ids) == 8000
+        assert all(r == sorted(r) for r in results)
+
+    def test_node(self):
+        a, b = idgenerator(1, seqbits=16), idgenerator(2, seqbits=8, blocksize=4)
+
+        assert a() == 65537 and b() == 513
+        assert a() >> 16 == 1
+
+        ids = [b() for _ in range(251)]
+        assert max(ids) >> 8 == 2
+        with pytest.raises(OverflowError):
+            b()
+
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires os.fork')
+    def test_fork_safe(self):
+        gen = idgenerator(os.getpid, fork_safe=True, nodebits=23)
+        parent = gen()
+        
+        rfd, wfd = os.pipe()
+        if (pid := os.fork()) == 0:
+            os.write(wfd, str(gen()).encode())
+            os._exit(0)
+        
+        os.waitpid(pid, 0)
+        os.close(wfd)
+        child = int(os.read(rfd, 64))
+        os.close(rfd)
+
+        assert child >> gen.seqbits == pid
+        assert child != gen() != parent
+
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires os.fork')
+    @parametrize('node', [None, 3])
+    def test_fork_safe_fixed_node(self, node):
+        gen = idgenerator(node, fork_safe=True, blocksize=4)
+        parent = [gen() for _ in range(3)]
+        
+        rfd, wfd = os.pipe()
+        if (pid := os.fork()) == 0:
+            os.write(wfd, ','.join(str(gen()) for _ in range(6)).encode())
+            os._exit(0)
+        
+        os.waitpid(pid, 0)
+        os.close(wfd)
+        child = [int(v) for v in os.read(rfd, 1024).split(b',')]
+        os.close(rfd)
+
+        parent += [gen() for _ in range(6)]
+        assert len(child) == 6
+        assert not set(child) & set(parent)
+        assert {v >> (gen.seqbits + gen.pidbits) for v in child + parent} == {node or 0}
+        assert max(child + parent) < 1 << 63
+
+    def test_bits(self):
+        gen = idgenerator((1 << 12) - 1, fork_safe=True)
+        assert gen.seqbits == 63 - 12 - 16
+        assert gen() < 1 << 63
+
+        with pytest.raises(ValueError):
+            idgenerator(1 << 12)
+        with pytest.raises(ValueError):
+            idgenerator(seqbits=48, fork_safe=True)
+        with pytest.raises(ValueError):
+            idgenerator(nodebits=-1)
+        with pytest.raises(ValueError):
+            idgenerator(seqbits=8, blocksize=256)
+
+    def test_uniqueid(self):
+        assert uniqueid['foo'] is uniqueid['foo']
+        assert uniqueid() != uniqueid()
+        assert repr(uniqueid['foo']()).startswith('uniqueid[foo][')
+
+        ns = uniqueid['configured']
+        ns.configure(node=5)
+        uid = ns()
+        assert isinstance(uid, ns)
+        assert uid >> 51 == 5
+        assert str(uid) == str(int(uid))
+        assert ns('id-{}') == f'id-{uid + 1}'
+
+    def test_uniqueid_configure_root(self):
+        before = uniqueid['before-configure']
+        separate = uniqueid['configured-separately']
+        separate.configure(node=5)
+        try:
+            uniqueid.configure(node=7)
+            assert uniqueid() >> 51 == 7
+            assert before() >> 51 == 7
+            assert uniqueid['after-configure']() >> 51 == 7
+            assert separate() >> 51 == 5
+        finally:
+            uniqueid.configure()
+
+    def test_uniqueid_configure_no_repeats(self):
+        ns = uniqueid['configure-no-repeats']
+        ids = [ns() for _ in range(3)]
+        ns.configure(blocksize=16)
+        ids += [ns() for _ in range(3)]
+        ns.configure()
+        ids += [ns() for _ in range(3)]
+        assert len(set(ids)) == len(ids)
+
+        ns = uniqueid['configure-no-repeats-root']
+        ids = [ns() for _ in range(3)]
+        uniqueid.configure()
+        ids += [ns() for _ in range(3)]
+        assert len(set(ids)) == len(ids)
+
+
+
+class ProfiledTests:
+
+    def test_basic(self):
+        registry = ProfileRegistry(True)
+
+        @registry.profiled
+        def func(delay):
+            """func docs"""
+            time.sleep(delay)
+            return delay
+
+        assert func.__name__ == 'func' and func.__doc__ == 'func docs'
+
+        for _ in range(5):
+            assert func(.001) == .001
+        func(.01)
+
+        info = registry.report()[func.__profile__.name]
+        assert info.calls == info.sampled == 6
+        assert info.min >= 1_000_000 and info.max >= 10_000_000
+        assert info.total >= info.min * 5 + info.max
+        assert info.min <= info.percentiles[50] < 10_000_000 <= info.percentiles[99] <= info.max
+        assert sum(n for _, n in info.histogram) == 6
+
+        registry.reset()
+        assert registry.report()[func.__profile__.name].calls == 0
+
+    def test_toggle_and_sample(self, monkeypatch):
+        monkeypatch.setenv(ProfileRegistry.envvar, 'off')
+        registry = ProfileRegistry()
+
+        @registry.profiled(name='func', sample=.25)
+        def func():
+            return 1
+
+        assert func() == 1
+        assert registry.report()['func'].calls == 0
+
+        registry.enable()
+        for _ in range(8):
+            func()
+        info = registry.report(reset=True)['func']
+        assert (info.calls, info.sampled) == (8, 2)
+
+        registry.disable()
+        func()
+        assert registry.report()['func'].calls == 0
+
+        monkeypatch.setenv(ProfileRegistry.envvar, '1')
+        assert ProfileRegistry().enabled
+
+    def test_async(self):
+        registry = ProfileRegistry(True)
+
+        @registry.profiled(name='afunc')
+        async def afunc():
+            await asyncio.sleep(.01)
+            return 1
+
+        assert asyncio.run(afunc()) == 1
+        info = registry.report()['afunc']
+        assert info.calls == 1 and info.min >= 10_000_000
+
+    def test_disabled_swaps_code(self):
+        registry = ProfileRegistry(False)
+        n = 10
+
+        def func(a, b=2, *, c=3):
+            return a + b + c + n
+
+        async def afunc(a, *, b=1):
+            return a + b
+
+        pfunc, pafunc = registry.profiled(func), registry.profiled(afunc)
+
+        for _ in range(2):
+            assert pfunc.__code__ is func.__code__ and pafunc.__code__ is afunc.__code__
+            assert pfunc(1) == pfunc(1, 2, c=3) == 16
+            assert asyncio.iscoroutinefunction(pafunc)
+            assert asyncio.run(pafunc(1, b=2)) == 3
+            assert registry.report()[pfunc.__profile__.name].calls == 0
+
+            registry.enable()
+            assert pfunc(1) == pfunc(1, 2, c=3) == 16
+            assert asyncio.iscoroutinefunction(pafunc)
+            assert asyncio.run(pafunc(1, b=2)) == 3
+            assert registry.report(reset=True)[pfunc.__profile__.name].calls == 2
+            registry.disable()
+
+    def test_non_functions(self):
+        registry = ProfileRegistry(False)
+
+        @lru_cache
+        def square(a):
+            return a * a
+
+        async def add(a, b):
+            return a + b
+
+        psquare = registry.profiled(square)
+        padd = registry.profiled(partial(add, 1))
+        assert psquare.__wrapped__ is square
+        assert asyncio.iscoroutinefunction(padd)
+
+        for enabled in (False, True, False):
+            enabled and registry.enable()
+            assert psquare(3) == 9
+            assert asyncio.run(padd(2)) == 3
+            info = registry.report(reset=True)
+            assert info[psquare.__profile__.name].calls == enabled
+            assert info[padd.__profile__.name].calls == enabled
+            registry.disable()
+
+    def test_weak_registry(self):
+        registry = ProfileRegistry(True)
+
+        @registry.profiled
+        def func():
+            return 1
+
+        assert len(registry._profiled) == 1
+        del func
+        gc.collect()
+        assert len(registry._profiled) == 0
+        registry.disable()
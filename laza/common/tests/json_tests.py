@@ -7,6 +7,7 @@ from statistics import mean
 
 
 from ..json import dumps, JsonOpt, loads
+from laza.common.proxy import Proxy, proxy_class_for
 
 xfail = pytest.mark.xfail
 parametrize = pytest.mark.parametrize
@@ -41,6 +42,18 @@ class JsonTests:
 
         # assert 0
 
+    def test_proxies(self):
+        data = {'a': Proxy(lambda: 'abc'), 'b': [Proxy(lambda: {'x': 1}, cache=True)]}
+        assert loads(dumps(data)) == {'a': 'abc', 'b': [{'x': 1}]}
+        assert dumps(proxy_class_for(str)(lambda: 'x')) == b'"x"'
+        assert dumps(Proxy(lambda: 1.5), opts=JsonOpt.DECODE) == '1.5'
+
+    def test_proxies_speed(self):
+        data = loads(paths[0].read_bytes())
+        proxied = {k: Proxy(lambda v=v: v, cache=True) for k, v in data.items()}
+        assert dumps(proxied) == dumps(data)
+        self.run('proxied', lambda: dumps(data), lambda: dumps(proxied), int(.5e3))
+
     def run(self, lbl, mfn, ifn, n=int(1e3), rep=2, r=3):
         mres, mt, mtt = ops_per_sec(n, *repeat(mfn, number=n, repeat=rep, globals=locals()))
         ires, it, itt = ops_per_sec(n, *repeat(ifn, number=n, repeat=rep, globals=locals()))
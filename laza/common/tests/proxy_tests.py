@@ -1,7 +1,14 @@
+import asyncio
+import copy
+import gc
+import pickle
 import pytest
+import threading
+import time
+import weakref
 
 
-from ..proxy import CachedProxy, CallableProxy, CachedCallableProxy, Proxy, WeakCallableProxy, WeakProxy, isproxy
+from ..proxy import AsyncCachedProxy, CachedProxy, CallableProxy, CachedCallableProxy, ContextProxy, Proxy, ValueProxy, WeakCallableProxy, WeakProxy, isproxy, proxy_class_for, ProxyNotReadyError
 
 
 
@@ -110,3 +117,414 @@ class ProxyTests:
         assert type(p2()) is type(target)
         assert p2 == p2()
         assert p2() is p2()
+
+
+
+class ProxyClassForTests:
+
+    def test_basic(self):
+        P = proxy_class_for(int)
+
+        assert P is proxy_class_for(int)
+        assert P is not proxy_class_for(int, CachedProxy)
+        assert issubclass(P, Proxy)
+        assert '__add__' in P.__dict__ and '__len__' not in P.__dict__
+
+        p = P(lambda: 5)
+        assert isproxy(p)
+        assert isinstance(p, int)
+        assert p == 5 and hash(p) == hash(5)
+        assert p + 1 == 1 + p == 6
+        assert -p == -5 and abs(P(lambda: -2)) == 2
+        assert int(p) == 5 and f'{p:03}' == '005'
+        assert p.bit_length() == 3
+
+    def test_weakly_cached(self):
+        class Foo:
+            pass
+
+        ref = weakref.ref(Foo)
+        P = proxy_class_for(Foo, CachedProxy)
+        assert P is proxy_class_for(Foo, CachedProxy)
+        assert P is not proxy_class_for(Foo)
+
+        del Foo, P
+        gc.collect()
+        assert ref() is None
+
+    def test_containers(self):
+        calls = []
+        def factory():
+            calls.append(1)
+            return [1, 2]
+
+        p = proxy_class_for(list, CachedProxy)(factory)
+        p += [3]
+        p[0] = 9
+        p.append(4)
+
+        assert p.__proxy_target__ == [9, 2, 3, 4]
+        assert len(p) == 4 and 2 in p and list(p) == [9, 2, 3, 4]
+        assert type(p).__hash__ is None
+        assert calls == [1]
+
+        v = proxy_class_for(dict, ValueProxy)({'a': 1})
+        assert v['a'] == v.get('a') == 1
+        assert {**v} == {'a': 1}
+
+    def test_speed(self, speed_profiler):
+
+        class Foo:
+            def __init__(self):
+                self.a = 1
+            
+            def __add__(self, other):
+                return self.a + other
+
+        target = Foo()
+        gen = proxy_class_for(Foo)(lambda: target)
+        old = Proxy(lambda: target)
+
+        profile = speed_profiler(int(1e5), labels=('direct', 'gen'))
+        profile(lambda: target.a, lambda: gen.a, 'getattr')
+        profile(lambda: target + 1, lambda: gen + 1, 'add')
+
+        profile = speed_profiler(int(1e5), labels=('gen', 'Proxy'))
+        profile(lambda: gen.a, lambda: old.a, 'getattr')
+        profile(lambda: gen + 1, lambda: old + 1, 'add')
+
+
+
+class CachedProxyTests:
+
+    def test_single_flight(self):
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def factory():
+            calls.append(1)
+            time.sleep(.02)
+            return [len(calls)]
+
+        p = Proxy(factory, cache=True)
+        res = []
+        def target():
+            barrier.wait()
+            res.append(p.__proxy_target__)
+
+        threads = [threading.Thread(target=target) for _ in range(8)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+            
+        assert calls == [1]
+        assert all(r is res[0] for r in res)
+
+    def test_invalidate(self):
+        calls = []
+        p = Proxy(lambda: calls.append(1) or len(calls), cache=True)
+
+        assert p == 1 and p == 1
+        p.__proxy_invalidate__()
+        assert p == 2
+        assert calls == [1, 1]
+
+    def test_ttl(self):
+        calls = []
+        p = Proxy(lambda: calls.append(1) or len(calls), cache=True, ttl=.02)
+
+        assert p == 1 and p == 1
+        time.sleep(.03)
+        assert p == 2
+
+        with pytest.raises(ValueError):
+            Proxy(lambda: 1, cache=True, refresh=True)
+
+    def test_refresh_ahead(self):
+        calls = []
+        release = threading.Event()
+
+        def factory():
+            if calls:
+                release.wait(1)
+            calls.append(1)
+            return len(calls)
+
+        p = Proxy(factory, cache=True, ttl=.02, refresh=.5)
+        assert p == 1
+        time.sleep(.02)
+
+        # readers get the stale value while a single refresh runs.
+        assert p == 1 and p == 1
+        release.set()
+        for _ in range(100):
+            if p == 2:
+                break
+            time.sleep(.005)
+        assert p == 2
+        assert calls == [1, 1]
+
+    def test_superseded_refresh(self):
+        calls, threads = [], []
+        release = threading.Event()
+
+        def factory():
+            calls.append(n := len(calls) + 1)
+            if n == 2:
+                threads.append(threading.current_thread().name)
+                release.wait(1)
+            return n
+
+        p = Proxy(factory, cache=True, ttl=.2, refresh=True)
+        assert p == 1
+        time.sleep(.21)
+        assert p == 1
+
+        for _ in range(100):
+            if len(calls) > 1:
+                break
+            time.sleep(.005)
+
+        # a newer load while refreshing wins over the refresh's late result.
+        p.__proxy_invalidate__()
+        assert p == 3
+        release.set()
+        time.sleep(.02)
+        assert p == 3 and calls == [1, 2, 3]
+        assert threads[0].startswith('ProxyRefresh')
+
+    def test_max_stale(self):
+        calls = []
+
+        def factory():
+            calls.append(1)
+            if len(calls) > 1:
+                raise LookupError(len(calls))
+            return len(calls)
+
+        p = Proxy(factory, cache=True, ttl=.02, refresh=True, max_stale=.04)
+        assert p == 1
+        time.sleep(.025)
+
+        # failed refreshes keep serving the stale value up to `max_stale`.
+        assert p == 1
+        for _ in range(100):
+            if len(calls) > 1:
+                break
+            time.sleep(.005)
+        assert p == 1
+
+        time.sleep(.05)
+        with pytest.raises(LookupError):
+            p.__proxy_target__
+        with pytest.raises(LookupError):
+            p.__proxy_target__
+
+        with pytest.raises(ValueError):
+            Proxy(lambda: 1, cache=True, ttl=1, max_stale=1)
+
+
+
+class ContextProxyTests:
+
+    def test_basic(self):
+        p = ContextProxy('tenant', default='public')
+
+        assert isproxy(p)
+        assert p == 'public'
+        assert p.upper() == 'PUBLIC'
+        
+        token = p.__proxy_set__('acme')
+        assert p == 'acme' and isinstance(p, str)
+        assert repr(p) == "ContextProxy(tenant='acme')"
+        p.__proxy_reset__(token)
+        assert p == 'public'
+
+        with pytest.raises(LookupError):
+            ContextProxy('unset').__proxy_target__
+
+    def test_isolation(self):
+        p = ContextProxy('current')
+        seen = {}
+
+        def worker(i):
+            p.__proxy_set__(i)
+            time.sleep(.01)
+            seen[i] = p.__proxy_target__
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(4)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        assert seen == {0: 0, 1: 1, 2: 2, 3: 3}
+
+        async def task(i):
+            p.__proxy_set__(i)
+            await asyncio.sleep(.01)
+            return p == i
+
+        async def main():
+            return await asyncio.gather(*(task(i) for i in range(4)))
+
+        assert asyncio.run(main()) == [True] * 4
+
+    def test_generated(self):
+        P = proxy_class_for(int, ContextProxy)
+        p = P('num', default=2)
+        assert p + 1 == 3
+        p.__proxy_set__(5)
+        assert p * 2 == 10
+
+
+
+class AsyncCachedProxyTests:
+
+    def test_basic(self):
+        calls = []
+
+        async def factory():
+            calls.append(1)
+            await asyncio.sleep(.01)
+            return {'a': len(calls)}
+
+        p = AsyncCachedProxy(factory)
+        assert isproxy(p)
+        assert repr(p) == 'AsyncCachedProxy(<not ready>)'
+        
+        with pytest.raises(ProxyNotReadyError):
+            p['a']
+
+        async def main():
+            res = await asyncio.gather(*(p.__proxy_ready__() for _ in range(4)))
+            assert all(r is res[0] for r in res)
+            assert p['a'] == 1 and isinstance(p, dict)
+            assert await p is res[0]
+
+        asyncio.run(main())
+        assert calls == [1]
+
+        p.__proxy_invalidate__()
+        with pytest.raises(ProxyNotReadyError):
+            p.get('a')
+
+        asyncio.run(p.__proxy_ready__())
+        assert p['a'] == 2
+
+    def test_retry_on_error(self):
+        calls = []
+
+        async def factory():
+            calls.append(1)
+            if len(calls) == 1:
+                raise ValueError('failed')
+            return 'ok'
+
+        p = AsyncCachedProxy(factory)
+
+        async def main():
+            with pytest.raises(ValueError):
+                await p
+            assert await p == 'ok'
+
+        asyncio.run(main())
+        assert p == 'ok'
+        assert calls == [1, 1]
+
+    def test_invalidate_while_loading(self):
+        calls = []
+
+        async def factory():
+            calls.append(n := len(calls) + 1)
+            await asyncio.sleep(.01)
+            return n
+
+        p = AsyncCachedProxy(factory)
+
+        async def main():
+            first = asyncio.ensure_future(p.__proxy_ready__())
+            await asyncio.sleep(0)
+            p.__proxy_invalidate__()
+            assert await first == 1
+            with pytest.raises(ProxyNotReadyError):
+                p + 0
+            assert await p == 2
+
+        asyncio.run(main())
+
+        # invalidating waits for the lock held while publishing a result.
+        lock = object.__getattribute__(p, '__proxy_lock__')
+        with lock:
+            th = threading.Thread(target=p.__proxy_invalidate__)
+            th.start()
+            th.join(.05)
+            assert th.is_alive() and p == 2
+        th.join()
+        with pytest.raises(ProxyNotReadyError):
+            p + 0
+
+
+
+def _factory():
+    return [1, 2]
+
+
+class FactoryProxy(CachedProxy):
+    __slots__ = ()
+    __proxy_capture__ = 'factory'
+
+
+class WeakFactoryProxy(WeakProxy):
+    __slots__ = ()
+    __proxy_capture__ = 'factory'
+
+
+class _Target:
+    pass
+
+
+_target = _Target()
+
+
+def _weak_factory():
+    return _target
+
+
+
+class CaptureTests:
+
+    def test_target(self):
+        target = [1, [2]]
+        p = Proxy(lambda: target)
+
+        c = copy.copy(p)
+        assert type(c) is list and c == target and c[1] is target[1]
+        d = copy.deepcopy(p)
+        assert type(d) is list and d == target and d[1] is not target[1]
+        
+        assert pickle.loads(pickle.dumps(p)) == target
+        assert type(pickle.loads(pickle.dumps(proxy_class_for(list)(lambda: target)))) is list
+
+    def test_factory(self):
+        p = FactoryProxy(_factory, ttl=5, refresh=.5)
+        assert p == [1, 2]
+
+        for c in (copy.copy(p), copy.deepcopy(p), pickle.loads(pickle.dumps(p))):
+            assert type(c) is FactoryProxy
+            assert c == [1, 2] and c.__proxy_target__ is not p.__proxy_target__
+            assert c.__proxy_factory__() == p.__proxy_factory__() == ((_factory,), dict(ttl=5, refresh=.5, max_stale=5))
+
+        g = proxy_class_for(list, FactoryProxy)(_factory)
+        c = pickle.loads(pickle.dumps(g))
+        assert type(c) is type(g)
+        assert c == [1, 2]
+
+    def test_factory_weak(self):
+        p = WeakFactoryProxy(_weak_factory)
+        assert p.__proxy_target__ is _target
+        assert p.__proxy_factory__() == ((_weak_factory,), {})
+
+        for c in (copy.copy(p), copy.deepcopy(p), pickle.loads(pickle.dumps(p))):
+            assert type(c) is WeakFactoryProxy
+            assert c.__proxy_target__ is _target
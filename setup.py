@@ -24,7 +24,7 @@ setup(
     include_package_data=True,
     zip_safe=True,
     python_requires="~=3.9",
-    install_requires=["typing-extensions ~=4.0.1"],
+    install_requires=["typing-extensions ~=4.0.1", "cachetools >=4.2"],
     extras_require={
         "json": ["orjson ~=3.6.5"],
         "locale": ["Babel"],
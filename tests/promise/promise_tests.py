@@ -1,12 +1,21 @@
+import asyncio
+import gc
 import pytest
+import sys
+import threading
+import time
 
+from concurrent.futures import ThreadPoolExecutor
 
 
 xfail = pytest.mark.xfail
 parametrize = pytest.mark.parametrize
 
 
-from laza.common.promises import Promise
+from laza.common.promises import (
+    Promise, PromiseExecutor, _TimerWheel, _timers, AggregateError, CancelledError, FailedError, 
+    InvalidStateError, PENDING, CANCELLED, FAILED, FULFILLED, enable_tracing, disable_tracing,
+)
 
 
 
@@ -38,3 +47,618 @@ class PromiseTests:
         assert 0
 
 
+
+
+
+class CallbackTests:
+
+    def test_slots(self):
+        p = Promise()
+        assert not hasattr(p, '__dict__')
+        assert p._Promise__callbacks is None
+
+        p.then(lambda v: None)
+        assert isinstance(p._Promise__callbacks, tuple)
+        
+        p.then(lambda v: None)
+        assert isinstance(p._Promise__callbacks, list)
+
+    def test_states(self):
+        calls = []
+        for settle in ('fulfil', 'cancel', 'fail'):
+            p = Promise()
+            p.then(
+                lambda v: calls.append(('fulfil', v)),
+                cancel=lambda v: calls.append(('cancel', v)),
+                fail=lambda v: calls.append(('fail', v)),
+            )
+            p.finaly(lambda: calls.append(('finaly', settle)))
+            getattr(p, settle)(1)
+
+        assert calls == [
+            ('fulfil', 1), ('finaly', 'fulfil'), 
+            ('cancel', 1), ('finaly', 'cancel'), 
+            ('fail', 1), ('finaly', 'fail'),
+        ]
+
+    def test_dedup_and_unbind(self):
+        calls = []
+        func = lambda v: calls.append(v)
+
+        p = Promise()
+        p.then(func)
+        p.then(func)
+        p.then(func, reject=func)
+        p.fulfil(1)
+        assert calls == [1]
+
+        p = Promise()
+        p.then(func, reject=func)
+        assert p._unbind(func, FULFILLED) == 1
+        assert p._unbind(func, FULFILLED) == 0
+        p.fulfil(2)
+        assert calls == [1]
+
+        p = Promise()
+        p.then(func, reject=func)
+        p._unbind(func)
+        p.cancel(3)
+        assert calls == [1]
+
+
+
+class TrampolineTests:
+
+    def test_deep_chain(self):
+        root = p = Promise()
+        for _ in range(sys.getrecursionlimit() * 5):
+            p = p.pipe(lambda v: v + 1)
+
+        root.fulfil(0)
+        assert p.result() == sys.getrecursionlimit() * 5
+
+        root = p = Promise()
+        for _ in range(sys.getrecursionlimit() * 5):
+            p = Promise(p)
+
+        root.fulfil('value')
+        assert p.result() == 'value'
+
+    def test_ordering(self):
+        calls = []
+        root = Promise()
+        child = root.pipe(lambda v: calls.append('pipe') or v)
+        child.then(lambda v: calls.append('child'))
+        for i in range(3):
+            root.then(lambda v, i=i: calls.append(i))
+
+        root.fulfil(1)
+        assert calls == ['pipe', 0, 1, 2, 'child']
+
+    def test_batch(self):
+        calls = []
+        items = [Promise() for _ in range(3)]
+        for p in items:
+            p.then(lambda v: calls.append(v))
+
+        with Promise.batch():
+            for i, p in enumerate(items):
+                p.fulfil(i + 1)
+                assert p.state is FULFILLED
+            assert calls == []
+
+        assert calls == [1, 2, 3]
+
+    def test_callback_error(self):
+        calls = []
+        p = Promise()
+        p.then(lambda v: 1/0)
+        p.then(lambda v: calls.append(v))
+
+        with pytest.raises(ZeroDivisionError):
+            p.fulfil(1)
+        assert calls == [1]
+
+
+
+class ThreadingTests:
+
+    @pytest.fixture(autouse=True)
+    def switchinterval(self):
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        yield
+        sys.setswitchinterval(interval)
+
+    def test_stress(self):
+        nthreads, npromises, ncallbacks = 8, 200, 20
+
+        promises = [Promise() for _ in range(npromises)]
+        derived = [[] for _ in range(npromises)]
+        calls = [0] * npromises
+        lock = threading.Lock()
+        barrier = threading.Barrier(nthreads + 1)
+
+        def callback(i):
+            def fn(v=None):
+                with lock:
+                    calls[i] += 1
+            return fn
+
+        def chain():
+            barrier.wait()
+            for _ in range(ncallbacks):
+                for i, p in enumerate(promises):
+                    p.then(callback(i))
+                    derived[i].append(p.pipe(lambda v: v * 2))
+
+        def settle():
+            barrier.wait()
+            for i, p in enumerate(promises):
+                p.settle(i)
+
+        threads = [threading.Thread(target=chain) for _ in range(nthreads)]
+        threads.append(threading.Thread(target=settle))
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+
+        assert calls == [nthreads * ncallbacks] * npromises
+        for i, items in enumerate(derived):
+            assert all(d.result() == i * 2 for d in items)
+
+    def test_settle_once(self):
+        nthreads = 8
+        
+        for _ in range(200):
+            p = Promise()
+            calls, won = [], []
+            p.then(lambda v: calls.append(v))
+            barrier = threading.Barrier(nthreads)
+
+            def settle(i):
+                barrier.wait()
+                try:
+                    p.fulfil(i)
+                except InvalidStateError:
+                    pass
+                else:
+                    won.append(i)
+
+            threads = [threading.Thread(target=settle, args=(i,)) for i in range(nthreads)]
+            for th in threads:
+                th.start()
+            for th in threads:
+                th.join()
+
+            assert len(won) == 1
+            assert calls == won == [p.result()]
+
+    def test_all(self):
+        items = [Promise() for _ in range(1000)]
+        res = Promise.all(items)
+
+        def settle(n):
+            for i in range(n, len(items), 4):
+                items[i].fulfil(i)
+
+        threads = [threading.Thread(target=settle, args=(n,)) for n in range(4)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+
+        assert res.result() == [*range(1000)]
+
+
+
+class CombinatorTests:
+
+    def test_all(self):
+        items = [Promise() for _ in range(1000)]
+        res = Promise.all([*items, 'value'])
+
+        for i, p in enumerate(items):
+            assert res.state is PENDING
+            p.fulfil(i)
+
+        assert res.result() == [*range(1000), 'value']
+        assert Promise.all([]).result() == []
+
+        a, b = Promise(), Promise()
+        res = Promise.all([a, b])
+        a.cancel('reason')
+        assert res.state is CANCELLED
+        b.fulfil(1)
+        assert res.state is CANCELLED
+
+    def test_all_settled(self):
+        a, b = Promise(), Promise()
+        res = Promise.all_settled([a, b, 3])
+        
+        b.fail(ValueError())
+        assert res.state is PENDING
+        a.fulfil(1)
+
+        a_, b_, c_ = res.result()
+        assert a_ is a and b_ is b
+        assert c_.result() == 3
+        assert b.state is FAILED
+
+    def test_any(self):
+        a, b, c = Promise(), Promise(), Promise()
+        res = Promise.any([a, b, c])
+
+        a.fail(ValueError())
+        b.fulfil(2)
+        c.fulfil(3)
+        assert res.result() == 2
+
+        a, b = Promise(), Promise()
+        res = Promise.any([a, b])
+        a.fail(err := ValueError())
+        b.cancel('reason')
+        
+        with pytest.raises(FailedError) as e:
+            res.result()
+        assert isinstance(e.value.reason, AggregateError)
+        assert e.value.reason.reasons == [err, 'reason']
+
+        assert Promise.any([Promise(), 1]).result() == 1
+
+    def test_race(self):
+        a, b = Promise(), Promise()
+        res = Promise.race([a, b])
+
+        b.cancel('reason')
+        a.fulfil(1)
+        assert res.state is CANCELLED
+        
+        assert Promise.race([Promise.fulfilled(1), Promise.fulfilled(2)]).result() == 1
+        assert Promise.race([]).state is PENDING
+
+
+
+class CancelTests:
+
+    def test_propagation(self):
+        calls = []
+        root = Promise()
+        derived = root.pipe(lambda v: v)
+        handled = root.pipe(cancel=lambda r: f'handled {r}')
+        chained = Promise(derived).pipe(lambda v: v)
+        chained.then(cancel=lambda r: calls.append(r))
+
+        root.cancel('reason')
+
+        assert derived.state is CANCELLED
+        assert chained.state is CANCELLED
+        assert handled.result() == 'handled reason'
+        assert calls == ['reason']
+
+        with pytest.raises(InvalidStateError):
+            root.cancel()
+
+    def test_timeout(self):
+        p = Promise().timeout(.02)
+        derived = p.pipe(lambda v: v)
+        assert _wait(derived, .5).state is CANCELLED
+        
+        with pytest.raises(CancelledError) as e:
+            p.result()
+        assert isinstance(e.value.reason, TimeoutError)
+
+        p = Promise().timeout(.02, 'too slow')
+        p.fulfil(1)
+        time.sleep(.05)
+        assert p.result() == 1
+
+        assert Promise.fulfilled(1).timeout(0).result() == 1
+
+    def test_timeout_off_wheel_thread(self):
+        threads = []
+
+        slow = Promise().timeout(.01)
+        slow.catch(lambda e: threads.append(threading.current_thread()) or time.sleep(.3))
+        fast = Promise().timeout(.03)
+
+        start = time.monotonic()
+        _wait(fast, .5)
+        assert time.monotonic() - start < .2
+        assert threads and threads[0] is not _timers.thread
+
+        with ThreadPoolExecutor(1, thread_name_prefix='custom') as executor:
+            p = Promise().timeout(.01, executor=executor)
+            p.catch(lambda e: threads.append(threading.current_thread()))
+            _wait(p, .5)
+            assert threads[-1].name.startswith('custom')
+
+    def test_many_timeouts(self):
+        promises = [Promise().timeout(60) for _ in range(10000)]
+        wheel = _timers
+        assert wheel.count >= 10000
+
+        for p in promises:
+            p.fulfil(1)
+        assert wheel.count == 0
+
+
+
+class TimerWheelTests:
+
+    def test_order_and_overflow(self):
+        # a tiny wheel spanning 64 ticks so timers cascade and overflow.
+        wheel = _TimerWheel(.002, bits=2, levels=3)
+        fired = []
+        start = time.monotonic()
+
+        delays = [i / 200 for i in range(40)]
+        for d in reversed(delays):
+            wheel.schedule(d, lambda d=d: fired.append((d, time.monotonic() - start)))
+        
+        cancelled = wheel.schedule(.05, lambda: fired.append('cancelled'))
+        assert cancelled.cancel() is True
+        assert cancelled.cancel() is False
+
+        deadline = time.monotonic() + 2
+        while len(fired) < len(delays) and time.monotonic() < deadline:
+            time.sleep(.01)
+
+        assert [d for d, _ in fired] == delays
+        assert all(at >= d for d, at in fired)
+        assert wheel.count == 0
+
+
+
+class ExecutorTests:
+
+    def test_run_in(self):
+        with ThreadPoolExecutor(2) as ex:
+            assert _wait(Promise.run_in(ex, pow, 2, 10)).result() == 1024
+
+            p = Promise.run_in(ex, int, 'x')
+            assert _wait(p).state is FAILED
+
+    def test_threads(self):
+        with PromiseExecutor(max_workers=4) as ex:
+            assert _wait(ex.submit(pow, 2, 3)).result() == 8
+            assert _wait(ex.map(pow, range(5), [2] * 5)).result() == [0, 1, 4, 9, 16]
+        assert ex.executor._shutdown
+
+    def test_processes(self):
+        with PromiseExecutor(max_workers=2, processes=True) as ex:
+            assert _wait(ex.map(pow, range(5), [2] * 5)).result() == [0, 1, 4, 9, 16]
+
+    def test_max_pending(self):
+        release = threading.Event()
+        ex = PromiseExecutor(ThreadPoolExecutor(4), max_pending=2)
+        
+        first = [ex.submit(release.wait) for _ in range(2)]
+
+        submitted = threading.Event()
+        def producer():
+            ex.submit(pow, 2, 2)
+            submitted.set()
+
+        th = threading.Thread(target=producer)
+        th.start()
+        assert not submitted.wait(.05)
+
+        release.set()
+        assert submitted.wait(1)
+        th.join()
+        assert all(_wait(p).result() is True for p in first)
+        ex.shutdown()
+
+    def test_cancel(self):
+        release = threading.Event()
+        calls = []
+        with ThreadPoolExecutor(1) as ex:
+            blocker = Promise.run_in(ex, release.wait)
+            p = Promise.run_in(ex, calls.append, 1)
+            p.cancel('no longer needed')
+            release.set()
+            _wait(blocker)
+        
+        assert p.state is CANCELLED
+        assert calls == []
+
+
+
+def _wait(p, timeout=1):
+    done = threading.Event()
+    p.finaly(done.set)
+    assert done.wait(timeout)
+    return p
+
+
+
+class AsyncioTests:
+
+    def test_await(self):
+
+        async def main():
+            loop = asyncio.get_running_loop()
+
+            p = Promise()
+            loop.call_later(.01, p.fulfil, 1)
+            assert await p == 1
+            assert await p == 1
+            assert await Promise.fulfilled(2) == 2
+
+            p = Promise()
+            threading.Timer(.01, p.fulfil, (3,)).start()
+            assert await p == 3
+
+            p = Promise()
+            threading.Timer(.01, p.fail, (ValueError('failed'),)).start()
+            with pytest.raises(FailedError) as e:
+                await p
+            assert isinstance(e.value.reason, ValueError)
+
+            with pytest.raises(CancelledError):
+                await Promise.cancelled('reason')
+
+        asyncio.run(main())
+
+    def test_to_future(self):
+
+        async def main():
+            p = Promise()
+            fut = p.to_future()
+            assert not fut.done()
+            p.fulfil(1)
+            assert await fut == 1
+
+        asyncio.run(main())
+
+    def test_from_future(self):
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            
+            fut = loop.create_future()
+            p = Promise.from_future(fut)
+            fut.set_result(1)
+            assert await p == 1
+
+            fut = loop.create_future()
+            p = Promise.from_future(fut)
+            fut.cancel()
+            await asyncio.sleep(0)
+            assert p.state is CANCELLED
+
+            with ThreadPoolExecutor(1) as ex:
+                assert await Promise.from_future(ex.submit(lambda: 2)) == 2
+
+        asyncio.run(main())
+
+    def test_from_coroutine(self):
+
+        async def coro(v):
+            await asyncio.sleep(.01)
+            return v
+
+        async def main():
+            assert await Promise.from_coroutine(coro(1)) == 1
+
+        asyncio.run(main())
+
+        loop = asyncio.new_event_loop()
+        th = threading.Thread(target=loop.run_forever)
+        th.start()
+        try:
+            p = Promise.from_coroutine(coro(2), loop)
+            done = threading.Event()
+            p.finaly(done.set)
+            assert done.wait(1)
+            assert p.result() == 2
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
+            th.join()
+            loop.close()
+
+
+
+
+class TracingTests:
+
+    @pytest.fixture(autouse=True)
+    def tracer(self):
+        unhandled = []
+        yield enable_tracing(sample=1, on_unhandled=unhandled.append)
+        disable_tracing()
+
+    def test_disabled(self):
+        disable_tracing()
+        assert Promise().__trace__ is None
+
+    def test_counters(self, tracer):
+        p1, p2, p3 = Promise(), Promise(), Promise()
+        p1.fulfil(1)
+        p2.cancel('reason').catch(lambda r: None)
+        
+        info = tracer.info()
+        assert info.created >= 3
+        assert info.settled >= 2 and info.rejected >= 1
+        assert info.pending == info.created - info.settled >= 1
+        assert info.latency.sampled == info.settled
+        assert p3.state is PENDING
+
+    def test_creation_site_and_chain(self, tracer):
+        p = Promise()
+        d = p.pipe(lambda v: v).pipe(lambda v: v)
+
+        tr = p.__trace__
+        assert d is not p
+        assert tr.stack[-1].name == 'test_creation_site_and_chain'
+        chain = list(d.__trace__.chain())
+        assert len(chain) == 3 and chain[0] is d.__trace__ and chain[-1] is tr
+        assert d.__trace__.format().count('test_creation_site_and_chain') == 3
+
+    def test_unhandled_on_gc(self, tracer):
+        unhandled = []
+        tracer.on_unhandled = unhandled.append
+
+        p = Promise()
+        p.fail(ValueError('lost'))
+        del p
+        gc.collect()
+        assert len(unhandled) == 1
+        assert isinstance(unhandled[0].reason, ValueError)
+        assert tracer.info().unhandled == 1
+
+        p = Promise()
+        p.catch(lambda r: None)
+        p.fail(ValueError('caught'))
+        del p
+        gc.collect()
+        assert len(unhandled) == 1
+
+    def test_internal_callbacks_dont_handle(self, tracer):
+        unhandled = []
+        tracer.on_unhandled = unhandled.append
+
+        p = Promise().timeout(10)
+        p.fail(ValueError('timed'))
+        
+        with ThreadPoolExecutor(1) as ex:
+            q = Promise.run_in(ex, int, 'x')
+        for _ in range(200):
+            if q.state is not PENDING:
+                break
+            time.sleep(.005)
+        
+        del p
+        gc.collect()
+        assert len(unhandled) == 1
+
+        tracer.check()
+        assert len(unhandled) == 2
+        assert isinstance(q.__trace__.reason, ValueError)
+
+    def test_gc_while_locked(self, tracer):
+        unhandled = []
+        tracer.on_unhandled = unhandled.append
+
+        p = Promise()
+        p.fail(ValueError('lost'))
+        cycle = [p]
+        cycle.append(cycle)
+        del p, cycle
+
+        with tracer.lock:
+            gc.collect()
+        assert len(unhandled) == 1
+
+    def test_unhandled_check(self, tracer):
+        unhandled = []
+        tracer.on_unhandled = unhandled.append
+
+        p = Promise.cancelled('lost')
+        tracer.check()
+        assert [t.reason for t in unhandled] == ['lost']
+        tracer.check()
+        assert len(unhandled) == 1
+        assert p.state is CANCELLED